@@ -38,6 +38,18 @@ class AssertionChange:
     def old_value(self):
         return self._value
 
+    @property
+    def signature(self) -> tuple:
+        # Hashable identity of the change: its type, property and final value, where list values are compared as sets
+        if not self._value:
+            value = None
+        elif isinstance(self._value, (list, tuple)):
+            value = frozenset(item.iri for item in self._value)
+        else:
+            value = self._value.iri
+
+        return self._type, self._changed_property.iri, value
+
     def __str__(self):
         return f"{self._indicator()} {self._changed_property}{self._str_value()}"
 
@@ -52,6 +64,39 @@ class AssertionChange:
         else:
             return f' {self._value}'
 
+    def to_dict(self):
+        return {
+            'type': self._type,
+            'property': self._changed_property.iri,
+            'value': self._serialize_value(self._value),
+            'old_value': self._serialize_value(self._old_value),
+        }
+
+    @classmethod
+    def from_dict(cls, data: hash, ontology: owl.Ontology):
+        return cls(
+            type=data['type'],
+            changed_property=ontology.world[data['property']],
+            value=cls._deserialize_value(data['value'], ontology),
+            old_value=cls._deserialize_value(data['old_value'], ontology),
+        )
+
+    @staticmethod
+    def _serialize_value(value):
+        if value is None:
+            return None
+        if isinstance(value, (list, tuple)):
+            return [item.iri for item in value]
+        return value.iri
+
+    @staticmethod
+    def _deserialize_value(value, ontology: owl.Ontology):
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return [ontology.world[iri] for iri in value]
+        return ontology.world[value]
+
 
 class CounterfactualExplanation:
     def __init__(self, individual: owl.NamedIndividual, changed_assertions: list[AssertionChange], proximity: float, sparcity: int):
@@ -79,3 +124,22 @@ class CounterfactualExplanation:
     def __str__(self):
         return "\n".join([str(change) for change in self._changed_assertions])
 
+    def to_dict(self):
+        # The individual is algorithm-specific and bound to the world it was created in,
+        # so only its textual representation is kept
+        return {
+            'individual': str(self._individual) if self._individual is not None else None,
+            'changed_assertions': [change.to_dict() for change in self._changed_assertions],
+            'proximity': self._proximity,
+            'sparcity': self._sparcity,
+        }
+
+    @classmethod
+    def from_dict(cls, data: hash, ontology: owl.Ontology):
+        return cls(
+            individual=data['individual'],
+            changed_assertions=[AssertionChange.from_dict(change, ontology) for change in data['changed_assertions']],
+            proximity=data['proximity'],
+            sparcity=data['sparcity'],
+        )
+
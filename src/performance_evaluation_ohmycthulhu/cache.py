@@ -0,0 +1,149 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import owlready2 as owl
+from .adapter import AlgorithmAdapter, CounterfactualExplanation
+from .examples import AlgorithmTestCase
+from .performance_analyzer import start_measurement, finish_measurement
+from .tracing import Tracer
+
+
+def ontology_hash(ontology: owl.Ontology) -> str:
+    # Triples are sorted, so the hash doesn't depend on the order they have been loaded in
+    buffer = io.BytesIO()
+    ontology.save(file=buffer, format='ntriples')
+    digest = hashlib.sha256()
+    for line in sorted(buffer.getvalue().splitlines()):
+        digest.update(line + b"\n")
+
+    return digest.hexdigest()
+
+
+def example_hash(example: hash) -> str:
+    return hashlib.sha256(json.dumps(example, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class CachedAdapter(AlgorithmAdapter):
+    # Reuses the explanations and meta of an earlier run of the same adapter version on the same ontology and example.
+    # Entries are stored on disk, the least recently used ones are evicted once the cache outgrows `max_size` bytes.
+    # Workers may share the directory, so it's scanned anew before every eviction instead of being indexed by each process.
+    # Every run of an example hits the same entry, so Program doesn't accept the adapter together with warmup runs or repetitions.
+    # A cached run reports the timer and spans of the run it has been cached from, so the analysis is the same as of the original run.
+    # The ontology's digest (see `ontology_hash`) is taken by the caller as soon as the ontology is loaded, before the examples
+    # are validated against it, and travels with the adapter to the workers, so every process keys the runs by the same digest
+    def __init__(self, adapter: AlgorithmAdapter, directory: str, version: str, ontology_digest: str, max_size: int = 2 ** 30):
+        self._adapter = adapter
+        self._directory = directory
+        self._version = version
+        self._ontology_digest = ontology_digest
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def run(self, example: AlgorithmTestCase):
+        key = self._key(example)
+        entry = self._read(key)
+
+        if entry is not None:
+            self._hits += 1
+            return [
+                CounterfactualExplanation.from_dict(explanation, example.ontology)
+                for explanation in entry['explanations']
+            ], {**entry['meta'], 'cache': 'hit'}
+
+        self._misses += 1
+        # The spans are cached with the timer, so a cached run reports both of the original run
+        tracer = Tracer()
+        example.progress['spans'] = tracer.spans
+        example.progress['spans_epoch'] = tracer.epoch
+        with tracer.activate():
+            begin = start_measurement()
+            algorithm_result, meta = self._adapter.run(example)
+            meta = {
+                **meta,
+                'timer': finish_measurement(begin, meta.get('child_usage')),
+                'spans': tracer.spans,
+                'spans_epoch': tracer.epoch,
+            }
+
+        self._write(key, {
+            'key': example.key,
+            'version': self._version,
+            'explanations': [explanation.to_dict() for explanation in algorithm_result],
+            'meta': meta,
+        })
+
+        return algorithm_result, {**meta, 'cache': 'miss'}
+
+    def _key(self, example: AlgorithmTestCase) -> str:
+        adapter = f"{type(self._adapter).__module__}.{type(self._adapter).__qualname__}"
+        parts = [self._ontology_digest, example_hash(example.example), adapter, self._version]
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # The modification time orders the entries by their last use
+        os.utime(path)
+
+        return entry
+
+    def _write(self, key: str, entry: hash):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Written into a temporary file first, so concurrent workers never read a partial entry
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(entry, file, default=str)
+        os.replace(temporary, path)
+
+        self._evict()
+
+    def _scan_entries(self) -> list[tuple[str, int]]:
+        # Keys and sizes of the entries on disk, the least recently used first
+        entries = []
+        for root, _, files in os.walk(self._directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    # Evicted by another worker while being scanned
+                    continue
+                entries.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+
+        return [(key, size) for _, key, size in sorted(entries)]
+
+    def _evict(self):
+        entries = self._scan_entries()
+        total = sum(size for _, size in entries)
+        # The entry just written is the most recent one, it's kept even when it alone outgrows the cache
+        for key, size in entries[:-1]:
+            if total <= self._max_size:
+                break
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                # Evicted by another worker sharing the cache
+                pass
@@ -0,0 +1,241 @@
+import argparse
+import importlib
+import os
+import sys
+from datetime import datetime
+from .adapter import AlgorithmAdapter
+from .cache import CachedAdapter, ontology_hash
+from .examples import ExamplesManager, read_examples
+from .memory_analyzer import MemoryAnalyzer
+from .merge import merge_result_stores, analyze_store
+from .ontology_store import load_ontology
+from .output_analyzer import OutputAnalyzer
+from .performance_analyzer import PerformanceAnalyzer
+from .profiling_analyzer import ProfilingAnalyzer
+from .program import Program
+from .ranking_analyzer import RankingAnalyzer
+from .regression_analyzer import RegressionAnalyzer, RegressionAnalyzerResult, Baseline
+from .result_store import ResultStore
+from .writers import JsonLinesWriter, CsvWriter, SqliteWriter, LogWriter
+
+
+def _quality_analyzer():
+    # NumPy is required only when the quality analyzer is selected
+    from .quality_analyzer import QualityAnalyzer
+    return QualityAnalyzer()
+
+
+ANALYZERS = {
+    'performance': PerformanceAnalyzer,
+    'ranking': RankingAnalyzer,
+    'quality': _quality_analyzer,
+    'memory': MemoryAnalyzer,
+    'profiling': ProfilingAnalyzer,
+}
+FORMATS = ['log', 'jsonl', 'csv', 'sqlite']
+
+
+def load_adapter(path: str) -> AlgorithmAdapter:
+    # Either `package.module:Class` or `package.module.Class`
+    module_name, _, class_name = path.replace(':', '.').rpartition('.')
+    if not module_name:
+        raise ValueError(f"Adapter {path} must be given as module:Class")
+
+    adapter = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(adapter, AlgorithmAdapter):
+        raise TypeError(f"{path} is not an AlgorithmAdapter")
+
+    return adapter
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must be given as INDEX/COUNT, got {value}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Shard {index} doesn't exist among {count} shards")
+
+    return index, count
+
+
+def ontology_source(value: str) -> str:
+    # Local files are turned into IRIs, so worker processes load the same file regardless of their working directory
+    return f"file://{os.path.abspath(value)}" if os.path.exists(value) else value
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='performance-evaluation', description='Evaluates counterfactual generation on ontologies')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='runs the examples and analyzes the results')
+    run.add_argument('--adapter', required=True, help='import path of the algorithm adapter, e.g. adapter:CEOAdapter')
+    run.add_argument('--adapter-path', action='append', default=[], help='directory added to the import path for the adapter')
+    run.add_argument('--ontology', required=True, type=ontology_source, help='path or IRI of the ontology')
+    run.add_argument('--examples', required=True, help='JSON or JSON Lines file with the examples')
+    run.add_argument('--analyzers', default='performance,ranking', help=f"comma-separated analyzers: {', '.join(ANALYZERS)}")
+    run.add_argument('--baseline', help='baseline timings, compared against by the regression analyzer when the file exists')
+    run.add_argument('--save-baseline', action='store_true', help='saves the timings of the run as the baseline')
+    run.add_argument('--output', default='output', help='directory for the result store, logs and records')
+    run.add_argument('--format', action='append', choices=FORMATS, help='output format of the analysis, may be repeated (default: log)')
+    run.add_argument('--traces', action='store_true', help="exports every example's spans as a Chrome trace into the output directory")
+    run.add_argument('--echo', action='store_true', help="prints every example's analysis as soon as it finishes")
+    run.add_argument('--resume', action='store_true', help='continues the existing result store, skipping every example stored in it whatever its status')
+    run.add_argument('--retry-failed', action='store_true', help='with --resume, runs again the examples stored as timed out, out of memory or crashed')
+    run.add_argument('--shard', type=parse_shard, default=(0, 1), help='runs only the shard INDEX/COUNT of the examples')
+    run.add_argument('--workers', type=int, default=1, help='number of worker processes')
+    run.add_argument('--warmup', type=int, default=0, help='discarded runs per example')
+    run.add_argument('--repetitions', type=int, default=1, help='measured runs per example')
+    run.add_argument('--timeout', type=float, help='time budget of each example in seconds')
+    run.add_argument('--memory-limit', type=int, help='address-space limit of each example in MB')
+    run.add_argument('--cache', help="directory caching the adapter's runs, reused while the ontology, example and version stay the same")
+    run.add_argument('--cache-version', default='0', help='version of the adapter, changing it invalidates the cache')
+    run.add_argument('--cache-size', type=int, default=1024, help='size of the cache in MB, least recently used runs are evicted')
+    run.add_argument('--ontology-cache', help='directory of pre-parsed quadstores, the ontology file is parsed once and copied by every worker')
+    run.add_argument('--batch-validation', action='store_true', help='checks the consistency of examples in batches')
+    run.add_argument('--lazy', action='store_true', help='loads the examples in chunks while running them')
+    run.set_defaults(handler=run_command)
+
+    merge = commands.add_parser('merge', help="combines shards' result stores and analyzes them together")
+    merge.add_argument('stores', nargs='+', help="shards' result stores")
+    merge.add_argument('--output', required=True, help='merged result store')
+    merge.add_argument('--ontology', type=ontology_source, help='path or IRI of the ontology, the merged results are analyzed when given')
+    merge.add_argument('--ontology-cache', help='directory of pre-parsed quadstores, the ontology file is parsed once')
+    merge.add_argument('--analyzers', default='performance,ranking', help=f"comma-separated analyzers: {', '.join(ANALYZERS)}")
+    merge.add_argument('--baseline', help='baseline timings, compared against by the regression analyzer when the file exists')
+    merge.set_defaults(handler=merge_command)
+
+    return parser
+
+
+def create_analyzers(names: str, baseline: str = None, profiles: str = None, traces: str = None) -> list[OutputAnalyzer]:
+    analyzers = []
+    for name in filter(None, (name.strip() for name in names.split(','))):
+        if name not in ANALYZERS:
+            raise ValueError(f"Unknown analyzer {name}, available: {', '.join(ANALYZERS)}")
+        # Profiles and traces of the examples are saved into the output directory
+        if name == 'profiling':
+            analyzers.append(ProfilingAnalyzer(profiles))
+        elif name == 'performance':
+            analyzers.append(PerformanceAnalyzer(traces))
+        else:
+            analyzers.append(ANALYZERS[name]())
+
+    # The profiler is started last and stopped first, so the work of other analyzers' hooks isn't profiled
+    analyzers.sort(key=lambda analyzer: isinstance(analyzer, ProfilingAnalyzer))
+
+    if baseline is not None and os.path.exists(baseline):
+        analyzers.append(RegressionAnalyzer(Baseline.load(baseline)))
+
+    return analyzers
+
+
+def create_writers(formats: list[str], output: str, run_name: str, echo: bool = False) -> list:
+    writers = {
+        'log': lambda: LogWriter(os.path.join(output, f"{run_name}.log"), header=f"Program run at {run_name}", echo=echo),
+        'jsonl': lambda: JsonLinesWriter(os.path.join(output, f"{run_name}-records.jsonl"), run=run_name),
+        'csv': lambda: CsvWriter(os.path.join(output, 'records'), run=run_name),
+        'sqlite': lambda: SqliteWriter(os.path.join(output, 'records.sqlite'), run=run_name),
+    }
+    return [writers[name]() for name in dict.fromkeys(formats)]
+
+
+def run_command(arguments: argparse.Namespace) -> int:
+    if arguments.save_baseline and arguments.baseline is None:
+        raise ValueError("--save-baseline requires --baseline")
+    if arguments.cache is not None and (arguments.warmup > 0 or arguments.repetitions > 1):
+        raise ValueError("--cache can't be combined with --warmup or --repetitions, the cached run would be measured repeatedly")
+
+    sys.path[:0] = arguments.adapter_path
+    adapter = load_adapter(arguments.adapter)
+    ontology = load_ontology(arguments.ontology, arguments.ontology_cache)
+    if arguments.cache is not None:
+        # Hashed before the examples are validated against the ontology, the workers get the digest with the adapter
+        adapter = CachedAdapter(adapter, arguments.cache, arguments.cache_version, ontology_hash(ontology), arguments.cache_size * 2 ** 20)
+    analyzers = create_analyzers(
+        arguments.analyzers,
+        arguments.baseline,
+        profiles=os.path.join(arguments.output, 'profiles'),
+        traces=os.path.join(arguments.output, 'traces') if arguments.traces else None,
+    )
+
+    shard_index, shard_count = arguments.shard
+    os.makedirs(arguments.output, exist_ok=True)
+    store_name = 'results.jsonl' if shard_count == 1 else f"results-{shard_index}-of-{shard_count}.jsonl"
+    store_path = os.path.join(arguments.output, store_name)
+    if os.path.exists(store_path) and os.path.getsize(store_path) > 0 and not arguments.resume:
+        print(f"{store_path} already exists, pass --resume to continue the run or remove it to start over", file=sys.stderr)
+        return 2
+
+    run_name = datetime.now().isoformat().replace(':', '_')
+    writers = create_writers(arguments.format or ['log'], arguments.output, run_name, arguments.echo)
+
+    program = Program(
+        adapter,
+        analyzers,
+        example_manager=ExamplesManager(
+            batch_validation=arguments.batch_validation,
+            lazy=arguments.lazy,
+            shard_index=shard_index,
+            shard_count=shard_count,
+        ),
+        callbacks=writers,
+        workers=arguments.workers,
+        ontology_source=arguments.ontology,
+        result_store=ResultStore(store_path, retry_failed=arguments.retry_failed),
+        warmup=arguments.warmup,
+        repetitions=arguments.repetitions,
+        timeout=arguments.timeout,
+        memory_limit=arguments.memory_limit * 2 ** 20 if arguments.memory_limit is not None else None,
+        # Results are released as they are analyzed, unless the baseline is built from them
+        keep_results=arguments.save_baseline,
+        ontology_cache=arguments.ontology_cache,
+        summarize=True,
+    )
+
+    try:
+        results, analysis_results = program.run(read_examples(arguments.examples), ontology)
+        for writer in writers:
+            writer(analysis_results)
+    finally:
+        for writer in writers:
+            writer.close()
+
+    for analysis in analysis_results:
+        print(analysis, end="\n\n")
+
+    if arguments.save_baseline:
+        Baseline.from_results(results).save(arguments.baseline)
+
+    return 1 if _has_regressions(analysis_results) else 0
+
+
+def merge_command(arguments: argparse.Namespace) -> int:
+    store = merge_result_stores(arguments.stores, arguments.output)
+    print(f"Merged {len(store.keys())} examples into {store.path}")
+    if arguments.ontology is None:
+        return 0
+
+    ontology = load_ontology(arguments.ontology, arguments.ontology_cache)
+    analysis_results = analyze_store(store, ontology, create_analyzers(arguments.analyzers, arguments.baseline))
+    for analysis in analysis_results:
+        print(analysis, end="\n\n")
+
+    return 1 if _has_regressions(analysis_results) else 0
+
+
+def _has_regressions(analysis_results) -> bool:
+    return any(
+        analysis.regressions
+        for analysis in analysis_results if isinstance(analysis, RegressionAnalyzerResult)
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    arguments = create_parser().parse_args(argv)
+    return arguments.handler(arguments)
+
+
+# Worker processes are spawned and re-import the main module, so the run must be guarded
+if __name__ == '__main__':
+    sys.exit(main())
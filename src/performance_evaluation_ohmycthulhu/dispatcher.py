@@ -0,0 +1,84 @@
+import queue
+import threading
+from typing import Callable
+from .output_analyzer import OutputAnalyzerResult, FormattedResult
+
+_STOP = object()
+
+
+class CallbackDispatcher:
+    # Invokes callbacks in a background thread, so reporting doesn't delay the next example.
+    # The queue is bounded: when callbacks fall behind, dispatching blocks until there is room again.
+    # The analysis is formatted by the dispatching thread, so the callbacks' thread only does the I/O
+    def __init__(self, callbacks: list[Callable[[list[OutputAnalyzerResult]], None]], max_size: int = 64):
+        self._callbacks = callbacks
+        self._queue = queue.Queue(max_size)
+        self._thread = None
+        self._error = None
+
+    @property
+    def has_callbacks(self):
+        return len(self._callbacks) > 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        if self._thread is not None or not self.has_callbacks:
+            return
+
+        self._thread = threading.Thread(target=self._run, name='callback-dispatcher', daemon=True)
+        self._thread.start()
+
+    def dispatch(self, analysis: list[OutputAnalyzerResult]):
+        if self._error is not None:
+            raise self._error
+
+        analysis = [FormattedResult(result) for result in analysis]
+        if self._thread is None:
+            self._invoke(analysis)
+            return
+
+        self._queue.put(analysis)
+
+    def close(self):
+        # Waits for queued analyses to be handled and flushes the callbacks
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        while (analysis := self._queue.get()) is not _STOP:
+            if self._error is not None:
+                # Callbacks have failed, the rest is drained so the producer isn't blocked until it notices
+                continue
+
+            try:
+                self._invoke(analysis)
+                if self._queue.empty():
+                    self._flush()
+            except Exception as error:
+                self._error = error
+
+        try:
+            self._flush()
+        except Exception as error:
+            self._error = self._error or error
+
+    def _invoke(self, analysis: list[OutputAnalyzerResult]):
+        for callback in self._callbacks:
+            callback(analysis)
+
+    def _flush(self):
+        # Buffered writers are flushed whenever the queue runs empty
+        for callback in self._callbacks:
+            if hasattr(callback, 'flush'):
+                callback.flush()
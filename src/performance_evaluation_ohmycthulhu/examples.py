@@ -1,13 +1,19 @@
+import hashlib
+import json
 import owlready2 as owl
-from typing import Union
+from itertools import islice
+from typing import Union, Iterable, Iterator
+from .ontology_index import OntologyIndex
 
 
 class AlgorithmTestCase:
-    def __init__(self, example: hash, ontology):
+    def __init__(self, example: hash, ontology, index: OntologyIndex = None):
         self._example = example
         self._ontology = ontology
+        self._index = index if index is not None else OntologyIndex(ontology)
         self._individual = None
         self._new_individuals = []
+        self._progress = {}
 
     @property
     def key(self):
@@ -17,6 +23,15 @@ class AlgorithmTestCase:
     def ontology(self):
         return self._ontology
 
+    @property
+    def example(self) -> hash:
+        return self._example
+
+    @property
+    def progress(self) -> hash:
+        # Adapters may record the meta reached so far here, it's reported when the run is interrupted
+        return self._progress
+
     @property
     def _name(self):
         return f"'text-example-{self.key}'"
@@ -33,7 +48,7 @@ class AlgorithmTestCase:
         if not isinstance(desired_cls_iris, Union[tuple, list]):
             desired_cls_iris = [desired_cls_iris]
 
-        return [self._get_class(self._ontology, iri) for iri in desired_cls_iris]
+        return [self._index.get_class(iri) for iri in desired_cls_iris]
 
 
     @property
@@ -42,7 +57,7 @@ class AlgorithmTestCase:
         if isinstance(primary_cls_iri, Union[tuple, list]):
             primary_cls_iri = primary_cls_iri[0]
 
-        return self._get_class(self._ontology, primary_cls_iri)
+        return self._index.get_class(primary_cls_iri)
 
     def destroy(self):
         if self._individual is not None:
@@ -51,7 +66,8 @@ class AlgorithmTestCase:
 
         for target in self._new_individuals:
             owl.destroy_entity(target)
-            self._individual = None
+
+        self._new_individuals = []
 
     @property
     def expected_changes(self) -> list[hash]:
@@ -61,8 +77,8 @@ class AlgorithmTestCase:
         individual = owl.Thing(name=self._name, namespace=self._primary_class.namespace)
 
         for assertion_info in self._example['assertions']:
-            ind_property = self._get_property(self._ontology, assertion_info['property'])
-            target, is_new = self._get_or_create_individual(self._ontology, assertion_info['value'])
+            ind_property = self._index.get_property(assertion_info['property'])
+            target, is_new = self._get_or_create_individual(self._index, assertion_info['value'])
 
             if is_new:
                 self._new_individuals.append(target)
@@ -75,24 +91,8 @@ class AlgorithmTestCase:
         return individual
 
     @staticmethod
-    def _get_class(ontology, iri):
-        for cls in ontology.classes():
-            if cls.iri == iri:
-                return cls
-
-        raise Exception(f"{iri} was not found")
-
-    @staticmethod
-    def _get_property(ontology, iri):
-        for cls in ontology.properties():
-            if cls.iri == iri:
-                return cls
-
-        raise Exception(f"{iri} was not found")
-
-    @staticmethod
-    def _get_or_create_individual(ontology, is_a):
-        cls = [AlgorithmTestCase._get_class(ontology, c) for c in is_a]
+    def _get_or_create_individual(index: OntologyIndex, is_a):
+        cls = [index.get_class(c) for c in is_a]
 
         base_cls = cls[0]
         instances = base_cls.instances()
@@ -116,41 +116,125 @@ class AlgorithmTestCase:
         return f"({assertion['property']} {assertion['value']})"
 
 
+def read_examples(path: str) -> Iterator[hash]:
+    # JSON Lines files are read one example at a time, plain JSON files hold a list of examples
+    if path.endswith('.jsonl'):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path) as file:
+            yield from json.load(file)
+
+
+def shard_of(key, shard_count: int) -> int:
+    # A stable hash of the key, so every machine assigns examples to the same shards without coordination
+    digest = hashlib.sha256(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shard_count
+
+
 class ExamplesManager:
-    def __init__(self):
+    def __init__(self, batch_validation: bool = False, lazy: bool = False, chunk_size: int = 100,
+                 shard_index: int = 0, shard_count: int = 1):
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(f"Shard {shard_index} doesn't exist among {shard_count} shards")
+
         self._ontologies = {}
         self._examples = []
         self._loaded = False
+        self._batch_validation = batch_validation
+        self._lazy = lazy
+        self._chunk_size = chunk_size
+        self._source = None
+        self._shard_index = shard_index
+        self._shard_count = shard_count
 
     @property
-    def examples(self) -> list[AlgorithmTestCase]:
+    def examples(self) -> Iterable[AlgorithmTestCase]:
         if not self._loaded:
             raise RuntimeError("Examples has not been loaded yet")
 
+        if self._lazy:
+            return self._iterate_examples(*self._source)
+
         return self._examples
 
-    def load(self, examples: list[hash], ontology: owl.Ontology):
+    def load(self, examples: Iterable[hash], ontology: owl.Ontology):
+        if self._lazy:
+            # Examples are verified and materialized chunk by chunk while they are being consumed
+            self._source = (examples, ontology)
+            self._loaded = True
+
+            return self.examples
+
+        examples = list(examples)
         self._verify_examples(examples)
-        examples = self._load_examples(examples, ontology)
+        examples = self._load_examples(self._select_shard(examples), ontology)
         self._ensure_test_cases_are_consistent(examples)
+        print("All test cases are consistent", end='\n\n')
 
         self._examples = examples
         self._loaded = True
 
         return self._examples
 
-    def _load_examples(self, examples: list[hash], ontology):
-        return [AlgorithmTestCase(example, ontology) for example in examples]
+    def _iterate_examples(self, examples: Iterable[hash], ontology: owl.Ontology) -> Iterator[AlgorithmTestCase]:
+        seen_keys = set()
+        examples = iter(examples)
+
+        while chunk := list(islice(examples, self._chunk_size)):
+            self._verify_examples(chunk, seen_keys)
+            test_cases = self._load_examples(self._select_shard(chunk), ontology)
+            self._ensure_test_cases_are_consistent(test_cases)
+
+            yield from test_cases
+
+        print("All test cases are consistent", end='\n\n')
+
+    def _select_shard(self, examples: list[hash]) -> list[hash]:
+        # Keys are verified across all shards, but only the examples of this shard are loaded and checked by the reasoner
+        if self._shard_count == 1:
+            return examples
 
-    def _verify_examples(self, examples: list[hash]):
-        keys = [example['key'] for example in examples]
-        unique_keys = set(keys)
-        duplicate_keys = [key for key in unique_keys if keys.count(key) > 1]
+        return [example for example in examples if shard_of(example['key'], self._shard_count) == self._shard_index]
+
+    def _load_examples(self, examples: list[hash], ontology):
+        index = self._get_index(ontology)
+        return [AlgorithmTestCase(example, ontology, index) for example in examples]
+
+    def _get_index(self, ontology: owl.Ontology) -> OntologyIndex:
+        if ontology not in self._ontologies:
+            self._ontologies[ontology] = OntologyIndex(ontology)
+
+        return self._ontologies[ontology]
+
+    def _verify_examples(self, examples: list[hash], seen_keys: set = None):
+        seen_keys = seen_keys if seen_keys is not None else set()
+        duplicate_keys = []
+        for example in examples:
+            key = example['key']
+            if key in seen_keys:
+                if key not in duplicate_keys:
+                    duplicate_keys.append(key)
+            else:
+                seen_keys.add(key)
 
         if duplicate_keys:
             raise Exception(f"Duplicate keys found: {', '.join(duplicate_keys)}")
 
     def _ensure_test_cases_are_consistent(self, test_cases: list[AlgorithmTestCase]):
+        if self._batch_validation:
+            inconsistent_cases = self._find_inconsistent_test_cases(test_cases)
+        else:
+            inconsistent_cases = self._check_test_cases_one_by_one(test_cases)
+
+        if len(inconsistent_cases):
+            raise owl.base.OwlReadyInconsistentOntologyError(
+                f"Following test cases are inconsistent: {', '.join([case.key for case in inconsistent_cases])}"
+            )
+
+    def _check_test_cases_one_by_one(self, test_cases: list[AlgorithmTestCase]):
         inconsistent_cases = []
         for test_case in test_cases:
             print(f"Checking consistency of {test_case.key}'s {test_case.individual}")
@@ -161,16 +245,50 @@ class ExamplesManager:
 
             test_case.destroy()
 
-        if len(inconsistent_cases):
-            raise owl.base.OwlReadyInconsistentOntologyError(
-                f"Following test cases are inconsistent: {', '.join([case.key for case in inconsistent_cases])}"
-            )
+        return inconsistent_cases
 
-        print("All test cases are consistent", end='\n\n')
+    def _find_inconsistent_test_cases(self, test_cases: list[AlgorithmTestCase]):
+        # Adding assertions never turns an inconsistent ontology into a consistent one,
+        # so a consistent group clears all of its members and only inconsistent groups are split further
+        if not test_cases:
+            return []
+
+        print(f"Checking consistency of {len(test_cases)} test cases together: {', '.join([case.key for case in test_cases])}")
+        is_consistent, error = self._ensure_test_cases_consistent_together(test_cases)
+
+        if is_consistent:
+            return []
+        if len(test_cases) == 1:
+            return list(test_cases)
+
+        middle = len(test_cases) // 2
+        inconsistent_cases = self._find_inconsistent_test_cases(test_cases[:middle]) + self._find_inconsistent_test_cases(test_cases[middle:])
+        if not inconsistent_cases:
+            # Neither half reproduces the inconsistency, the test cases conflict only with each other.
+            # The group is decided by checking its test cases one by one, as without batching
+            print(f"Test cases {', '.join([case.key for case in test_cases])} are inconsistent only together, checking them one by one")
+            return self._check_test_cases_one_by_one(test_cases)
+
+        return inconsistent_cases
+
+    def _ensure_test_cases_consistent_together(self, test_cases: list[AlgorithmTestCase]):
+        # Every test case inserts its individual under its own name, so they can be reasoned about in a single call
+        for test_case in test_cases:
+            test_case.individual
+
+        try:
+            return self._ensure_ontology_consistent(test_cases[0].ontology)
+        finally:
+            for test_case in test_cases:
+                test_case.destroy()
 
     def _ensure_test_case_consistent(self, test_case: AlgorithmTestCase):
+        return self._ensure_ontology_consistent(test_case.ontology)
+
+    @staticmethod
+    def _ensure_ontology_consistent(ontology: owl.Ontology):
         try:
-            owl.sync_reasoner(test_case.ontology, debug=0)
+            owl.sync_reasoner(ontology, debug=0)
         except owl.base.OwlReadyInconsistentOntologyError as error:
             return False, error
 
@@ -0,0 +1,200 @@
+import copy
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import traceback
+from .adapter import AlgorithmAdapter
+from .performance_analyzer import start_measurement, finish_measurement
+from .program_result import ProgramResult
+from . import worker
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_PROGRESS_INTERVAL = 1.0
+
+
+def _serve(connection, algorithm: AlgorithmAdapter, ontology_source: str, memory_limit: int, warmup: int, repetitions: int, ontology_cache: str = None):
+    if hasattr(os, 'setsid'):
+        # The worker leads its own process group, so reasoners started by it are killed together with it
+        os.setsid()
+    if memory_limit is not None and resource is not None:
+        # The limit is inherited by reasoners' JVMs, so it has to leave room for their heap
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    worker.initialize_worker(algorithm, ontology_source, warmup, repetitions, ontology_cache)
+    # Loading the ontology isn't a part of any example's budget
+    connection.send(('ready', None))
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            connection.send(message)
+
+    while (example := connection.recv()) is not None:
+        test_case = worker.create_test_case(example)
+        finished = threading.Event()
+        reporter = threading.Thread(target=_report_progress, args=(send, test_case.progress, finished), daemon=True)
+        reporter.start()
+
+        try:
+            message = ('done', worker.run_test_case(test_case))
+        except MemoryError:
+            message = ('memory_exceeded', None)
+        except Exception:
+            message = ('error', traceback.format_exc())
+        finally:
+            finished.set()
+            reporter.join()
+
+        send(message)
+
+
+def _report_progress(send, progress: hash, finished: threading.Event):
+    # Only what has changed since the previous beat is sent: top-level spans closed since then, each copied once,
+    # the name of the stage in progress and the rest of the progress recorded by the adapter (e.g. counters).
+    # Copying the whole span tree every beat would grow with the run and slow down the measured process
+    spans, sent = None, 0
+    while not finished.wait(_PROGRESS_INTERVAL):
+        if progress.get('spans') is not spans:
+            # A new run (e.g. the next repetition) records its spans from scratch
+            spans, sent = progress.get('spans'), 0
+        closed = sent
+        while spans is not None and closed < len(spans) and spans[closed]['end'] is not None:
+            closed += 1
+
+        try:
+            update = {
+                'spans_from': sent,
+                'spans': copy.deepcopy(spans[sent:closed]) if spans is not None else [],
+                'open_stage': _stage_stub(spans[closed]) if spans is not None and closed < len(spans) else None,
+                'meta': copy.deepcopy({name: value for name, value in progress.items() if name != 'spans'}),
+            }
+        except RuntimeError:
+            # The progress has been modified while being copied, it is sent on the next beat
+            continue
+
+        send(('progress', update))
+        sent = closed
+
+
+def _stage_stub(record: hash) -> hash:
+    # The open stage without its children, which are still being recorded
+    return {'name': record['name'], 'start': record['start'], 'end': None, 'attributes': dict(record['attributes']), 'children': []}
+
+
+class IsolatedRunner:
+    # Runs examples one by one in a separate process that keeps the ontology loaded between examples.
+    # When an example exceeds its budget, the process is killed with its reasoners and started again for the next one
+    def __init__(self, algorithm: AlgorithmAdapter, ontology_source: str, timeout: float = None,
+                 memory_limit: int = None, warmup: int = 0, repetitions: int = 1, ontology_cache: str = None):
+        self._algorithm = algorithm
+        self._ontology_source = ontology_source
+        self._ontology_cache = ontology_cache
+        self._timeout = timeout
+        self._memory_limit = memory_limit
+        self._warmup = warmup
+        self._repetitions = repetitions
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._connection = None
+
+    def run(self, example: hash) -> hash:
+        self._ensure_started()
+        begin = start_measurement()
+        deadline = time.monotonic() + self._timeout if self._timeout is not None else None
+        progress, spans = {}, []
+        self._connection.send(example)
+
+        while True:
+            remaining = deadline - time.monotonic() if deadline is not None else _PROGRESS_INTERVAL
+            if remaining <= 0:
+                self._kill()
+                return self._interrupted(example, progress, begin, ProgramResult.TIMEOUT)
+
+            try:
+                if not self._connection.poll(min(remaining, _PROGRESS_INTERVAL)):
+                    if not self._process.is_alive():
+                        self._kill()
+                        return self._interrupted(example, progress, begin, ProgramResult.CRASHED)
+                    continue
+
+                kind, payload = self._connection.recv()
+            except (EOFError, OSError):
+                self._kill()
+                return self._interrupted(example, progress, begin, ProgramResult.CRASHED)
+
+            if kind == 'progress':
+                spans = spans[:payload['spans_from']] + payload['spans']
+                open_stage = [payload['open_stage']] if payload['open_stage'] is not None else []
+                progress = {**payload['meta'], 'spans': spans + open_stage}
+            elif kind == 'done':
+                return {**payload, 'status': ProgramResult.FINISHED}
+            elif kind == 'memory_exceeded':
+                self._kill()
+                return self._interrupted(example, progress, begin, ProgramResult.MEMORY_EXCEEDED)
+            else:
+                raise RuntimeError(f"Example {example['key']} has failed in isolated worker:\n{payload}")
+
+    def close(self):
+        if self._process is None:
+            return
+
+        try:
+            self._connection.send(None)
+            self._process.join(self._timeout)
+        except (BrokenPipeError, OSError):
+            pass
+        self._kill()
+
+    def _ensure_started(self):
+        if self._process is not None and self._process.is_alive():
+            return
+
+        self._connection, child_connection = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_serve,
+            args=(child_connection, self._algorithm, self._ontology_source, self._memory_limit, self._warmup, self._repetitions, self._ontology_cache),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+        try:
+            self._connection.recv()
+        except EOFError:
+            self._kill()
+            raise RuntimeError(f"Isolated worker couldn't load {self._ontology_source}")
+
+    def _kill(self):
+        if self._process is None:
+            return
+
+        # The group is killed even when the worker itself has died, so its reasoners don't outlive it
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        if self._process.is_alive():
+            self._process.kill()
+
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    @staticmethod
+    def _interrupted(example: hash, progress: hash, begin: hash, status: str) -> hash:
+        print(f"Example {example['key']} has been interrupted: {status}")
+
+        return {
+            'key': example['key'],
+            'explanations': [],
+            'meta': {**progress, 'timer': finish_measurement(begin)},
+            'status': status,
+        }
@@ -0,0 +1,212 @@
+import tracemalloc
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult, OutputAnalyzerSummary
+from .program_result import ProgramResult
+from .examples import AlgorithmTestCase
+from .stats import StreamingSummary
+from .tracing import add_stage_listener, remove_stage_listener
+
+
+class StagePeaks:
+    # Measures the exact peak of traced memory within every stage: the peak is reset when a stage opens and read right before it closes.
+    # Resetting it loses the peak of the example so far, so it's kept here too
+    def __init__(self):
+        self._stages = []
+        self._peak = 0
+
+    @property
+    def stages(self) -> list[hash]:
+        return self._stages
+
+    def __call__(self, event: str, record: hash):
+        _, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        if event == 'open':
+            tracemalloc.reset_peak()
+        else:
+            self._stages.append({'stage': record['name'], 'peak': peak})
+
+    def peak(self) -> int:
+        # The peak of the whole example so far
+        return max(self._peak, tracemalloc.get_traced_memory()[1])
+
+
+class MemoryAnalyzerResultItem:
+    def __init__(self, test_case: AlgorithmTestCase, current: int, peak: int, top_allocations: list[hash], stages: list[hash]):
+        self._test_case = test_case
+        self._current = current
+        self._peak = peak
+        self._top_allocations = top_allocations
+        self._stages = stages
+
+    @property
+    def test_case(self):
+        return self._test_case
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def peak(self):
+        return self._peak
+
+    @property
+    def top_allocations(self):
+        return self._top_allocations
+
+    @property
+    def stages(self):
+        return self._stages
+
+    def to_records(self) -> list[hash]:
+        total = {'key': self._test_case.key, 'stage': 'total', 'current': self._current, 'peak': self._peak}
+        stages = [
+            {'key': self._test_case.key, 'stage': stage['stage'], 'current': None, 'peak': stage['peak']}
+            for stage in self._stages
+        ]
+        return [total, *stages]
+
+    def __str__(self):
+        return f"Example ({self._test_case.key}): {self._test_case}\n" \
+               f"Traced memory (in MB): retained {self._str_memory(self._current)}, peak {self._str_memory(self._peak)}\n" \
+               f"{self.__str_stages__()}\n{self.__str_allocations__()}"
+
+    def __str_stages__(self):
+        if not self._stages:
+            return ''
+        header = 'Peaks by stages:'
+        body = "\n".join([f"{stage['stage']}: {self._str_memory(stage['peak'])}" for stage in self._stages])
+        return f"{header}\n{body}"
+
+    def __str_allocations__(self):
+        header = 'Top allocations:'
+        body = "\n".join([
+            f"{allocation['location']}: {self._str_memory(allocation['size'])} in {allocation['count']} blocks"
+            for allocation in self._top_allocations
+        ])
+        return f"{header}\n{body}"
+
+    @staticmethod
+    def _str_memory(value):
+        return 'n/a' if value is None else round(value / 2 ** 20, 3)
+
+
+class MemoryAnalyzerResult(OutputAnalyzerResult):
+    def __init__(self, items: list[MemoryAnalyzerResultItem]):
+        self._items = items
+
+    @property
+    def items(self):
+        return self._items
+
+    def to_records(self) -> list[hash]:
+        return [record for item in self._items for record in item.to_records()]
+
+    def __str__(self):
+        return "Memory analysis:\n" + ('\n' + '*' * 10 + '\n').join([str(x) for x in self._items])
+
+
+class MemoryAnalyzerSummary(OutputAnalyzerSummary):
+    def __init__(self, counters: hash, metrics: dict[str, StreamingSummary]):
+        super().__init__('Memory summary', counters, metrics)
+
+
+class MemoryAnalyzer(OutputAnalyzer):
+    # Memory is traced in the process that invokes the hooks, so Program accepts the analyzer
+    # only when it runs examples in the main process (workers=1 and no isolation)
+    def __init__(self, top_allocations: int = 10, frames: int = 1):
+        super().__init__()
+        self._top_allocations = top_allocations
+        self._frames = frames
+        self._running = {}
+        self._measurements = {}
+        self._metrics = {}
+
+    def name(self):
+        return 'Memory Analyzer'
+
+    def measures_in_process(self) -> bool:
+        return True
+
+    def before_test_case(self, test_case: AlgorithmTestCase):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        stage_peaks = StagePeaks()
+        self._running[test_case.key] = {
+            'snapshot': snapshot,
+            'stage_peaks': stage_peaks,
+        }
+        add_stage_listener(stage_peaks)
+
+    def after_test_case(self, test_case: AlgorithmTestCase, algorithm_result):
+        running = self._running.pop(test_case.key)
+        remove_stage_listener(running['stage_peaks'])
+        current, _ = tracemalloc.get_traced_memory()
+        peak = running['stage_peaks'].peak()
+        snapshot = tracemalloc.take_snapshot()
+
+        self._measurements[test_case.key] = {
+            'current': current,
+            'peak': peak,
+            'top_allocations': self._find_top_allocations(running['snapshot'], snapshot),
+            'stages': running['stage_peaks'].stages,
+        }
+
+    def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
+        return MemoryAnalyzerResult(
+            [self._analyze_item(example) for example in examples if example.test_case.key in self._measurements]
+        )
+
+    def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
+        return self.analyze([example])
+
+    def update(self, example: ProgramResult):
+        if example.test_case.key not in self._measurements:
+            return
+
+        item = self._analyze_item(example)
+        # The stages and snapshots' differences aren't needed once the example is folded in
+        del self._measurements[example.test_case.key]
+
+        self._add_metric('retained', item.current)
+        self._add_metric('peak', item.peak)
+        for stage in item.stages:
+            if stage['peak'] is not None:
+                self._add_metric(f"peak: {stage['stage']}", stage['peak'])
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return MemoryAnalyzerSummary({}, self._metrics)
+
+    def _add_metric(self, name: str, value: int):
+        self._metrics.setdefault(name, StreamingSummary()).add(value)
+
+    def _analyze_item(self, example: ProgramResult) -> MemoryAnalyzerResultItem:
+        measurement = self._measurements[example.test_case.key]
+
+        return MemoryAnalyzerResultItem(
+            test_case=example.test_case,
+            current=measurement['current'],
+            peak=measurement['peak'],
+            top_allocations=measurement['top_allocations'],
+            stages=measurement['stages'],
+        )
+
+    def _find_top_allocations(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> list[hash]:
+        # Only allocations made while the example was running are taken into account
+        trace_filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        differences = after.filter_traces(trace_filters).compare_to(before.filter_traces(trace_filters), 'lineno')
+
+        return [
+            {
+                'location': str(difference.traceback),
+                'size': difference.size_diff,
+                'count': difference.count_diff,
+            }
+            for difference in differences[:self._top_allocations]
+        ]
@@ -0,0 +1,52 @@
+import sys
+import owlready2 as owl
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .program_result import ProgramResult
+from .result_store import ResultStore
+
+
+def merge_result_stores(paths: list[str], output: str) -> ResultStore:
+    # Shards run disjoint slices of the examples, so records are simply combined.
+    # When an example has been run by several shards (e.g. the number of shards has changed), a finished run is preferred,
+    # otherwise the later one (e.g. an interrupted example run again with --retry-failed)
+    records = {}
+    for path in paths:
+        for record in ResultStore(path).records():
+            previous = records.get(record['key'])
+            if previous is None or _is_finished(record) or not _is_finished(previous):
+                records[record['key']] = record
+
+    store = ResultStore(output)
+    for key, record in records.items():
+        if key not in store:
+            store.write(record)
+
+    return store
+
+
+def analyze_store(store: ResultStore, ontology: owl.Ontology, analyzers: list[OutputAnalyzer]) -> list[OutputAnalyzerResult]:
+    # Aggregates are recomputed from the merged results, so they are exact for the whole run rather than combined per shard.
+    # Analyzers relying on hooks (e.g. MemoryAnalyzer) have no measurements of stored examples and skip them
+    for result in store.iterate(ontology):
+        for analyzer in analyzers:
+            analyzer.update(result)
+
+    return [analyzer.finalize() for analyzer in analyzers]
+
+
+def _is_finished(record: hash) -> bool:
+    return record.get('status', ProgramResult.FINISHED) == ProgramResult.FINISHED
+
+
+def main(arguments: list[str]):
+    if len(arguments) < 2:
+        print("Usage: python -m performance_evaluation_ohmycthulhu.merge OUTPUT SHARD_STORE [SHARD_STORE ...]")
+        return 1
+
+    store = merge_result_stores(arguments[1:], arguments[0])
+    print(f"Merged {len(store.keys())} examples into {store.path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
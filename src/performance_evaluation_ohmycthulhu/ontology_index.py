@@ -0,0 +1,28 @@
+import owlready2 as owl
+
+
+# Maps IRIs of the ontology's classes and properties to the entities.
+# The index is built once and shared by all test cases of the ontology.
+class OntologyIndex:
+    def __init__(self, ontology: owl.Ontology):
+        self._ontology = ontology
+        self._classes = {cls.iri: cls for cls in ontology.classes()}
+        self._properties = {prop.iri: prop for prop in ontology.properties()}
+
+    @property
+    def ontology(self):
+        return self._ontology
+
+    def get_class(self, iri):
+        return self._get(self._classes, iri)
+
+    def get_property(self, iri):
+        return self._get(self._properties, iri)
+
+    @staticmethod
+    def _get(entities: dict, iri):
+        entity = entities.get(iri)
+        if entity is None:
+            raise Exception(f"{iri} was not found")
+
+        return entity
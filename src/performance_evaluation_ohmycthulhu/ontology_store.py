@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import owlready2 as owl
+
+
+def source_path(ontology_source: str):
+    # Only local files can be hashed, remote IRIs are loaded as they are
+    path = ontology_source[len('file://'):] if ontology_source.startswith('file://') else ontology_source
+    return path if os.path.isfile(path) else None
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def build_quadstore(ontology_source: str, directory: str) -> tuple[str, str]:
+    # The source is parsed once into a quadstore named by the hash of the file, so an edited file gets a new quadstore.
+    # Returns the quadstore's path and the IRI of the ontology stored in it
+    digest = file_hash(source_path(ontology_source))
+    path = os.path.join(directory, f"{digest}.sqlite3")
+    description_path = os.path.join(directory, f"{digest}.json")
+
+    if os.path.exists(path) and os.path.exists(description_path):
+        with open(description_path) as file:
+            return path, json.load(file)['iri']
+
+    os.makedirs(directory, exist_ok=True)
+    # Built under a temporary name first, so workers building the same quadstore at once never open a partial one
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.sqlite3.tmp')
+    os.close(descriptor)
+    os.remove(temporary)
+
+    world = owl.World(filename=temporary)
+    ontology = world.get_ontology(ontology_source).load()
+    iri = ontology.base_iri
+    world.save()
+    world.close()
+
+    descriptor, temporary_description = tempfile.mkstemp(dir=directory, suffix='.json.tmp')
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump({'source': ontology_source, 'iri': iri}, file)
+    os.replace(temporary, path)
+    os.replace(temporary_description, description_path)
+
+    return path, iri
+
+
+def load_ontology(ontology_source: str, cache_directory: str = None) -> owl.Ontology:
+    # Without a cache directory, or for remote IRIs, the ontology is parsed as usual.
+    # Otherwise, the quadstore is copied into an in-memory database backing the default world, so runs are measured
+    # against the same in-memory store as without the cache, and the individuals they insert never reach the cached file.
+    # Copying the database is much faster than parsing
+    if cache_directory is None or source_path(ontology_source) is None:
+        return owl.get_ontology(ontology_source).load()
+
+    path, iri = build_quadstore(ontology_source, cache_directory)
+
+    memory = sqlite3.connect(':memory:', isolation_level='EXCLUSIVE', check_same_thread=False)
+    disk = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        disk.backup(memory)
+    finally:
+        disk.close()
+
+    # Given an existing file, owlready2 opens the quadstore as it is instead of creating a new one.
+    # The connection is the in-memory copy, the file itself isn't opened
+    owl.default_world.set_backend(filename=path, connection=memory)
+    # The ontology is already stored in the quadstore, so loading it by its IRI doesn't parse anything
+    return owl.default_world.get_ontology(iri).load()
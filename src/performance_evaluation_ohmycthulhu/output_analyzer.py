@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from .examples import AlgorithmTestCase
 from .program_result import ProgramResult
+from .stats import StreamingSummary
 
 
 class OutputAnalyzerResult(ABC):
@@ -8,6 +9,77 @@ class OutputAnalyzerResult(ABC):
     def __str__(self):
         pass
 
+    def to_records(self) -> list[hash]:
+        # Flat records sharing the same fields, so they can be written into JSON Lines, CSV or SQLite.
+        # Results without structured output have none, record writers skip them
+        return []
+
+    def to_dict(self) -> hash:
+        return {
+            'type': type(self).__name__,
+            'records': self.to_records(),
+        }
+
+
+class FormattedResult(OutputAnalyzerResult):
+    # A result with its string and records formatted in advance. Callbacks run in a background thread while the next example
+    # changes the ontology, so results referring to its entities are formatted before being passed to them
+    def __init__(self, result: OutputAnalyzerResult):
+        self._result = result
+        self._type_name = type(result).__name__
+        self._string = str(result)
+        self._records = result.to_records()
+
+    @property
+    def result(self) -> OutputAnalyzerResult:
+        return self._result
+
+    @property
+    def type_name(self) -> str:
+        return self._type_name
+
+    def to_records(self) -> list[hash]:
+        return self._records
+
+    def __str__(self):
+        return self._string
+
+
+class OutputAnalyzerSummary(OutputAnalyzerResult):
+    # Aggregates of all examples folded into an analyzer: counters and streaming summaries of metrics
+    def __init__(self, title: str, counters: hash, metrics: dict[str, StreamingSummary]):
+        self._title = title
+        self._counters = counters
+        self._metrics = metrics
+
+    @property
+    def counters(self) -> hash:
+        return self._counters
+
+    @property
+    def metrics(self) -> dict[str, StreamingSummary]:
+        return self._metrics
+
+    def to_records(self) -> list[hash]:
+        counters = [
+            {'metric': name, **{field: None for field in StreamingSummary().summary()}, 'count': value}
+            for name, value in self._counters.items()
+        ]
+        metrics = [{'metric': name, **metric.summary()} for name, metric in self._metrics.items()]
+        return [*counters, *metrics]
+
+    def __str__(self):
+        counters = [f"{name}: {value}" for name, value in self._counters.items()]
+        metrics = [f"{name}: {self._str_summary(metric.summary())}" for name, metric in self._metrics.items()]
+        return "\n".join([f"{self._title}:", *counters, *metrics])
+
+    @staticmethod
+    def _str_summary(summary: hash):
+        if summary['count'] == 0:
+            return 'n/a'
+        return f"count {summary['count']}, min {summary['min']}, median {summary['median']}, mean {summary['mean']}, " \
+               f"p95 {summary['p95']}, stddev {summary['stddev']}, 95% CI [{summary['ci_low']}, {summary['ci_high']}]"
+
 
 class OutputAnalyzer(ABC):
     @abstractmethod
@@ -22,6 +94,20 @@ class OutputAnalyzer(ABC):
     def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
         pass
 
+    def update(self, example: ProgramResult):
+        # Online analyzers fold the example into their aggregates, so Program can release it.
+        # By default, examples are kept and analyzed together when the run is finalized.
+        # The list is created on the first update, so analyzers whose constructors don't call the base one keep working
+        self.__dict__.setdefault('_updated_examples', []).append(example)
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return self.analyze(self.__dict__.get('_updated_examples', []))
+
+    def measures_in_process(self) -> bool:
+        # Analyzers measuring examples through the hooks (e.g. traced memory or a profile) measure the process invoking them.
+        # Program invokes the hooks only around examples it runs itself, so it rejects such analyzers for pool and isolated runs
+        return False
+
     def before_test_case(self, test_case: AlgorithmTestCase):
         pass
 
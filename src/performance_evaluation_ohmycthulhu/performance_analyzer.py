@@ -1,51 +1,298 @@
+import json
+import os
+import sys
 import time
 from typing import Union
-from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult, OutputAnalyzerSummary
 from .program_result import ProgramResult
 from .examples import AlgorithmTestCase
+from .stats import summarize, StreamingSummary
+from .tracing import measure_stages, render_spans, chrome_trace_events
+from .writers import file_name
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, child-process and memory accounting is skipped there
+    resource = None
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAX_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def start_measurement() -> hash:
+    snapshot = {
+        'time': time.time(),
+        'perf_counter_ns': time.perf_counter_ns(),
+        'cpu_time': time.process_time(),
+        'children_cpu_time': None,
+        'max_rss': None,
+        'children_max_rss': None,
+    }
+
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # Reasoners run as JVM child processes, their usage is visible once they have been waited for
+        children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        snapshot['children_cpu_time'] = children_usage.ru_utime + children_usage.ru_stime
+        snapshot['max_rss'] = usage.ru_maxrss * _MAX_RSS_UNIT
+        snapshot['children_max_rss'] = children_usage.ru_maxrss * _MAX_RSS_UNIT
+
+    return snapshot
+
+
+def finish_measurement(begin: hash, child_usage: hash = None) -> hash:
+    end = start_measurement()
+
+    timer = {
+        'begin': begin['time'],
+        'end': end['time'],
+        'wall_ns': end['perf_counter_ns'] - begin['perf_counter_ns'],
+        'cpu_time': end['cpu_time'] - begin['cpu_time'],
+        'children_cpu_time': end['children_cpu_time'] - begin['children_cpu_time']
+        if begin['children_cpu_time'] is not None else None,
+        # Peaks can't be attributed to a single example, so the peak reached by its end is recorded.
+        # For children, it is the peak of the largest child process so far
+        'max_rss': end['max_rss'],
+        'children_max_rss': end['children_max_rss'],
+    }
+
+    if child_usage is not None:
+        _account_child_usage(timer, child_usage)
+
+    return timer
+
+
+def _account_child_usage(timer: hash, child_usage: hash):
+    # Child processes kept alive between examples (e.g. a reasoner's JVM serving many calls) are accounted by the system
+    # only once they have been waited for. The algorithm reports their usage within the run as meta['child_usage']:
+    # {'cpu_time', 'max_rss', 'reaped_cpu_time'}, where the last one is the CPU time already reported by earlier runs
+    # of the processes that have exited during this run, which the system accounts for now
+    cpu_time = child_usage.get('cpu_time', 0) - child_usage.get('reaped_cpu_time', 0)
+    if timer['children_cpu_time'] is not None:
+        timer['children_cpu_time'] = max(timer['children_cpu_time'] + cpu_time, 0.0)
+    else:
+        timer['children_cpu_time'] = child_usage.get('cpu_time')
+
+    if child_usage.get('max_rss') is not None:
+        timer['children_max_rss'] = max(timer['children_max_rss'] or 0, child_usage['max_rss'])
+
+
+def measure_samples(example: ProgramResult) -> hash:
+    # Durations of the whole run and of every stage, one sample per measured run
+    runs = example.meta['repetitions'] if 'repetitions' in example.meta else [example.meta]
+    samples = {'total': [], 'stages': {}}
+
+    for run in runs:
+        samples['total'].append(PerformanceAnalyzer._measure_elapsed_time(run['timer']))
+        for stage, duration in measure_stage_durations(run).items():
+            samples['stages'].setdefault(stage, []).append(duration)
+
+    return samples
+
+
+def measure_stage_durations(run: hash) -> hash:
+    # The time of a run spent in every stage, by its name. A stage entered several times is a single sample of their total
+    durations = {}
+    for stage in measure_stages(run):
+        durations[stage['stage']] = durations.get(stage['stage'], 0.0) + stage['duration']
+
+    return durations
+
+
+def measure_counters(example: ProgramResult) -> list[hash]:
+    # Counters reported by the algorithm, e.g. reasoner calls, as {stage: {counter: value}}, one entry per measured run
+    runs = example.meta['repetitions'] if 'repetitions' in example.meta else [example.meta]
+    return [run['counters'] for run in runs if 'counters' in run]
 
 
 class PerformanceAnalyzerResultItem:
-    def __init__(self, test_case: AlgorithmTestCase, elapsed_time: float, checkpoints: Union[list[hash], None]):
+    def __init__(self, test_case: AlgorithmTestCase, elapsed_time: float, stages: Union[list[hash], None],
+                 cpu_time: float = None, children_cpu_time: float = None, max_rss: int = None,
+                 children_max_rss: int = None, repetitions: hash = None, status: str = ProgramResult.FINISHED,
+                 counters: hash = None, spans: list[hash] = None):
         self._test_case = test_case
         self._elapsed_time = elapsed_time
-        self._checkpoints = checkpoints
+        self._stages = stages
+        self._cpu_time = cpu_time
+        self._children_cpu_time = children_cpu_time
+        self._max_rss = max_rss
+        self._children_max_rss = children_max_rss
+        self._repetitions = repetitions
+        self._status = status
+        self._counters = counters
+        self._spans = spans
+
+    @property
+    def test_case(self):
+        return self._test_case
+
+    @property
+    def elapsed_time(self):
+        return self._elapsed_time
+
+    @property
+    def stages(self):
+        return self._stages
+
+    @property
+    def cpu_time(self):
+        return self._cpu_time
+
+    @property
+    def children_cpu_time(self):
+        return self._children_cpu_time
+
+    @property
+    def max_rss(self):
+        return self._max_rss
+
+    @property
+    def children_max_rss(self):
+        return self._children_max_rss
+
+    @property
+    def repetitions(self):
+        return self._repetitions
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def counters(self):
+        return self._counters
+
+    @property
+    def spans(self):
+        return self._spans
+
+    def to_records(self) -> list[hash]:
+        # The whole run is the 'total' stage, every stage of the algorithm is a record of its own
+        total = {
+            'key': self._test_case.key,
+            'status': self._status,
+            'stage': 'total',
+            'duration': self._elapsed_time,
+            'cpu_time': self._cpu_time,
+            'children_cpu_time': self._children_cpu_time,
+            'max_rss': self._max_rss,
+            'children_max_rss': self._children_max_rss,
+        }
+        stages = [
+            {
+                **{field: None for field in total},
+                'key': self._test_case.key,
+                'status': self._status,
+                'stage': stage['stage'],
+                'duration': stage['duration'],
+            }
+            for stage in (self._stages or [])
+        ]
+        return [total, *stages]
 
     def __str__(self):
-        return f"Example ({self._test_case.key}): {self._test_case}\nTime (in s): {self._elapsed_time}\n{self.__str_checkpoints__()}"
+        return f"Example ({self._test_case.key}): {self._test_case}\n{self.__str_status__()}Time (in s): {self._elapsed_time}\n{self.__str_resources__()}\n{self.__str_stages__()}{self.__str_spans__()}{self.__str_counters__()}{self.__str_repetitions__()}"
+
+    def __str_status__(self):
+        if self._status == ProgramResult.FINISHED:
+            return ''
+        return f"Status: {self._status}\n"
+
+    def __str_resources__(self):
+        cpu = f"CPU time (in s): python {self._str_value(self._cpu_time)}, children {self._str_value(self._children_cpu_time)}"
+        memory = f"Peak RSS (in MB): python {self._str_memory(self._max_rss)}, children {self._str_memory(self._children_max_rss)}"
+        return f"{cpu}\n{memory}"
 
-    def __str_checkpoints__(self):
-        if self._checkpoints is None:
+    def __str_stages__(self):
+        if not self._stages:
             return ''
-        header = 'Checkpoints:'
-        body = "\n".join([f"{checkpoint['from']} => {checkpoint['to']}: {checkpoint['duration']}" for checkpoint in self._checkpoints])
+        header = 'Stages:'
+        body = "\n".join([f"{stage['stage']}: {stage['duration']}" for stage in self._stages])
         return f"{header}\n{body}"
 
+    def __str_spans__(self):
+        if not self._spans:
+            return ''
+        # Spans of the same name are merged under their parent, e.g. every reasoner call of a stage
+        return "\nSpans (in s):\n" + "\n".join(render_spans(self._spans))
+
+    def __str_counters__(self):
+        if not self._counters:
+            return ''
+        # A row per stage and a column per counter, counters not incremented in a stage are left as 0
+        names = list(dict.fromkeys(name for values in self._counters.values() for name in values))
+        rows = [
+            [stage, *[str(round(values.get(name, 0), 3)) for name in names]]
+            for stage, values in self._counters.items()
+        ]
+        widths = [max(len(row[column]) for row in [['stage', *names], *rows]) for column in range(len(names) + 1)]
+        lines = [
+            " | ".join(cell.ljust(width) for cell, width in zip(row, widths))
+            for row in [['stage', *names], *rows]
+        ]
+        return "\nCounters:\n" + "\n".join(lines)
+
+    def __str_repetitions__(self):
+        if self._repetitions is None:
+            return ''
+        header = f"\nRepetitions ({self._repetitions['total']['count']} runs):"
+        total = f"total: {self._str_summary(self._repetitions['total'])}"
+        stages = [
+            f"{stage['stage']}: {self._str_summary(stage['summary'])}{self._str_missing(stage.get('missing', 0))}"
+            for stage in self._repetitions['stages']
+        ]
+        return "\n".join([header, total, *stages])
+
+    @staticmethod
+    def _str_summary(summary: hash):
+        return f"min {summary['min']}, median {summary['median']}, mean {summary['mean']}, p95 {summary['p95']}, " \
+               f"stddev {summary['stddev']}, 95% CI [{summary['ci_low']}, {summary['ci_high']}]"
+
+    @staticmethod
+    def _str_missing(missing: int):
+        return f" (missing in {missing} runs)" if missing > 0 else ''
+
+    @staticmethod
+    def _str_value(value):
+        return 'n/a' if value is None else value
+
+    @staticmethod
+    def _str_memory(value):
+        return 'n/a' if value is None else round(value / 2 ** 20, 2)
+
 
 class PerformanceAnalyzerResult(OutputAnalyzerResult):
     def __init__(self, items: list[PerformanceAnalyzerResultItem]):
         self._items = items
 
+    @property
+    def items(self):
+        return self._items
+
+    def to_records(self) -> list[hash]:
+        return [record for item in self._items for record in item.to_records()]
+
     def __str__(self):
         return "Performance analysis:\n" + ('\n' + '*' * 10 + '\n').join([str(x) for x in self._items])
 
 
+class PerformanceAnalyzerSummary(OutputAnalyzerSummary):
+    def __init__(self, counters: hash, metrics: dict[str, StreamingSummary]):
+        super().__init__('Performance summary', counters, metrics)
+
+
 class PerformanceAnalyzer(OutputAnalyzer):
-    def __init__(self):
-        self._timers = {}
+    # Given a directory, the spans of every example are exported there as a Chrome trace, `{key}.json`
+    def __init__(self, traces: str = None):
+        super().__init__()
+        self._traces = traces
+        self._statuses = {}
+        self._metrics = {}
 
     def name(self):
         return 'Performance Analyzer'
 
-    def before_test_case(self, test_case: AlgorithmTestCase):
-        self._timers[test_case.key] = {
-            'begin': time.time(),
-            'end': None,
-        }
-
-    def after_test_case(self, test_case: AlgorithmTestCase, algorithm_result):
-        self._timers[test_case.key]['end'] = time.time()
-
     def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
         return PerformanceAnalyzerResult(
             [self._analyze_item(example) for example in examples]
@@ -54,22 +301,92 @@ class PerformanceAnalyzer(OutputAnalyzer):
     def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
         return PerformanceAnalyzerResult([self._analyze_item(example)])
 
+    def update(self, example: ProgramResult):
+        self._statuses[example.status] = self._statuses.get(example.status, 0) + 1
+        if not example.is_finished:
+            # Interrupted runs would skew the timings, they are only counted
+            return
+
+        samples = measure_samples(example)
+        for stage, durations in {'total': samples['total'], **samples['stages']}.items():
+            for duration in durations:
+                self._add_metric(f"time (in s): {stage}", duration)
+
+        timer = example.meta['timer']
+        for field in ['cpu_time', 'children_cpu_time', 'max_rss', 'children_max_rss']:
+            if timer.get(field) is not None:
+                self._add_metric(field, timer[field])
+
+        if self._traces is not None and example.meta.get('spans'):
+            self._export_trace(example)
+
+        for counters in measure_counters(example):
+            for stage, values in counters.items():
+                for name, value in values.items():
+                    self._add_metric(f"{name}: {stage}", value)
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return PerformanceAnalyzerSummary(
+            {f"{status} examples": count for status, count in self._statuses.items()},
+            self._metrics,
+        )
+
+    def _add_metric(self, name: str, value: float):
+        self._metrics.setdefault(name, StreamingSummary()).add(value)
+
     def _analyze_item(self, example: ProgramResult) -> PerformanceAnalyzerResultItem:
-        timer = self._timers[example.test_case.key]
+        # Program times every run itself, so examples run in workers or restored from a store are measured the same way
+        timer = example.meta['timer']
 
         return PerformanceAnalyzerResultItem(
             test_case=example.test_case,
-            elapsed_time=timer['end'] - timer['begin'],
-            checkpoints=self._measure_checkpoints(example.meta['checkpoints']) if 'checkpoints' in example.meta else None
+            elapsed_time=self._measure_elapsed_time(timer),
+            stages=measure_stages(example.meta),
+            cpu_time=timer.get('cpu_time'),
+            children_cpu_time=timer.get('children_cpu_time'),
+            max_rss=timer.get('max_rss'),
+            children_max_rss=timer.get('children_max_rss'),
+            repetitions=self._measure_repetitions(example.meta['repetitions']) if 'repetitions' in example.meta else None,
+            status=example.status,
+            counters=example.meta.get('counters'),
+            spans=example.meta.get('spans'),
         )
 
+    def _export_trace(self, example: ProgramResult):
+        # Every measured run is a thread of the trace, so repetitions are shown one under another
+        runs = example.meta['repetitions'] if 'repetitions' in example.meta else [example.meta]
+        events = [
+            event
+            for index, run in enumerate(runs)
+            for event in chrome_trace_events(run.get('spans', []), pid=0, tid=index, epoch=run.get('spans_epoch', 0.0))
+        ]
+
+        os.makedirs(self._traces, exist_ok=True)
+        with open(os.path.join(self._traces, f"{file_name(example.test_case.key)}.json"), 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, default=str)
+
+    def _measure_repetitions(self, repetitions: list[hash]) -> hash:
+        # Stages are matched across repetitions by their names. A run may skip a stage (e.g. it has ended early),
+        # such stages are summarized over the runs that have them and report how many runs miss them
+        stages = {}
+        for repetition in repetitions:
+            for stage, duration in measure_stage_durations(repetition).items():
+                stages.setdefault(stage, []).append(duration)
+
+        return {
+            'total': summarize([self._measure_elapsed_time(repetition['timer']) for repetition in repetitions]),
+            'stages': [
+                {
+                    'stage': stage,
+                    'summary': summarize(durations),
+                    'missing': len(repetitions) - len(durations),
+                } for stage, durations in stages.items()
+            ],
+        }
+
     @staticmethod
-    def _measure_checkpoints(checkpoints):
-        points = list(checkpoints.items())
-        return [
-            {
-                'from': start_pos[0],
-                'to': end_pos[0],
-                'duration': end_pos[1] - start_pos[1]
-            } for start_pos, end_pos in zip(points[:-1], points[1:])
-        ]
\ No newline at end of file
+    def _measure_elapsed_time(timer: hash) -> float:
+        if timer.get('wall_ns') is not None:
+            return timer['wall_ns'] / 1e9
+
+        return timer['end'] - timer['begin']
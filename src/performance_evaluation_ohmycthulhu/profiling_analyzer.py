@@ -0,0 +1,219 @@
+import cProfile
+import os
+import pstats
+from abc import ABC, abstractmethod
+from typing import Callable
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .program_result import ProgramResult
+from .examples import AlgorithmTestCase
+from .writers import file_name
+
+
+class ProfilerBackend(ABC):
+    # A profiler started and stopped around a single example. Every example gets its own instance
+    @abstractmethod
+    def start(self):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+    @abstractmethod
+    def save(self, path: str) -> list[str]:
+        # Writes the artifacts of the profile next to `path` (without an extension) and returns their paths
+        pass
+
+    @abstractmethod
+    def top_functions(self, count: int) -> list[hash]:
+        # Functions with the highest cumulative time: {'function', 'calls', 'own', 'cumulative'} with times in seconds
+        pass
+
+
+class CProfileBackend(ProfilerBackend):
+    # Profiles the thread the example runs in with cProfile.
+    # Besides the pstats dump, the call graph is written as collapsed stacks (`a;b;c microseconds`) for flame graph tools
+    def __init__(self, max_depth: int = 64, min_share: float = 0.001):
+        self._max_depth = max_depth
+        self._min_share = min_share
+        self._profile = None
+        self._stats = None
+
+    def start(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self._stats = pstats.Stats(self._profile)
+
+    def save(self, path: str) -> list[str]:
+        stats_path, stacks_path = f"{path}.pstats", f"{path}.collapsed"
+        self._stats.dump_stats(stats_path)
+
+        with open(stacks_path, 'w') as file:
+            for stack, microseconds in self.collapsed_stacks().items():
+                file.write(f"{';'.join(stack)} {microseconds}\n")
+
+        return [stats_path, stacks_path]
+
+    def top_functions(self, count: int) -> list[hash]:
+        entries = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {'function': self._label(function), 'calls': calls, 'own': round(own, 6), 'cumulative': round(cumulative, 6)}
+            for function, (_, calls, own, cumulative, _) in entries[:count]
+        ]
+
+    def collapsed_stacks(self) -> dict[tuple, int]:
+        # cProfile keeps only caller-callee pairs, not whole stacks. Stacks are rebuilt from the roots down,
+        # and the time of a function is split among its callees in proportion to the time they spent when called from it
+        stats = self._stats.stats
+        callees = {}
+        for function, (_, _, _, _, callers) in stats.items():
+            for caller, (_, _, _, cumulative) in callers.items():
+                callees.setdefault(caller, []).append((function, cumulative))
+
+        stacks = {}
+        roots = [function for function, entry in stats.items() if not entry[4]]
+        # Calls below the share of the total time are folded into their caller, so the number of stacks stays bounded
+        threshold = sum(stats[root][3] for root in roots) * self._min_share
+        for root in roots:
+            self._collapse(root, stats[root][3], (), callees, stacks, threshold)
+
+        return {stack: microseconds for stack, microseconds in stacks.items() if microseconds > 0}
+
+    def _collapse(self, function, seconds: float, stack: tuple, callees: hash, stacks: hash, threshold: float):
+        _, _, own, cumulative, _ = self._stats.stats[function]
+        stack = (*stack, self._label(function))
+        share = seconds / cumulative if cumulative > 0 else 0.0
+        children = [
+            (callee, callee_seconds * share) for callee, callee_seconds in callees.get(function, [])
+            # Recursive calls are already accounted for in the time of the outer call
+            if callee_seconds * share >= threshold and self._label(callee) not in stack
+        ]
+
+        if len(stack) >= self._max_depth:
+            children = []
+        remaining = seconds - sum(child_seconds for _, child_seconds in children)
+        stacks[stack] = stacks.get(stack, 0) + round(max(remaining, own * share) * 1e6)
+
+        for callee, child_seconds in children:
+            self._collapse(callee, child_seconds, stack, callees, stacks, threshold)
+
+    @staticmethod
+    def _label(function: tuple) -> str:
+        file, line, name = function
+        if file == '~':
+            # Built-in functions have no location
+            return name
+        return f"{os.path.basename(file)}:{line}({name})"
+
+
+class ProfilingAnalyzerResultItem:
+    def __init__(self, test_case: AlgorithmTestCase, top_functions: list[hash], artifacts: list[str]):
+        self._test_case = test_case
+        self._top_functions = top_functions
+        self._artifacts = artifacts
+
+    @property
+    def test_case(self):
+        return self._test_case
+
+    @property
+    def top_functions(self):
+        return self._top_functions
+
+    @property
+    def artifacts(self):
+        return self._artifacts
+
+    def to_records(self) -> list[hash]:
+        return [
+            {'key': self._test_case.key, 'rank': rank, **function}
+            for rank, function in enumerate(self._top_functions, start=1)
+        ]
+
+    def __str__(self):
+        functions = "\n".join([
+            f"{rank}. {function['function']}: cumulative {function['cumulative']}s, own {function['own']}s in {function['calls']} calls"
+            for rank, function in enumerate(self._top_functions, start=1)
+        ])
+        return f"Example ({self._test_case.key}): {self._test_case}\n" \
+               f"Profile: {', '.join(self._artifacts) or 'not saved'}\n" \
+               f"Top functions by cumulative time (in s):\n{functions}"
+
+
+class ProfilingAnalyzerResult(OutputAnalyzerResult):
+    def __init__(self, items: list[ProfilingAnalyzerResultItem]):
+        self._items = items
+
+    @property
+    def items(self):
+        return self._items
+
+    def to_records(self) -> list[hash]:
+        return [record for item in self._items for record in item.to_records()]
+
+    def __str__(self):
+        return "Profiling analysis:\n" + ('\n' + '*' * 10 + '\n').join([str(x) for x in self._items])
+
+
+class ProfilingAnalyzer(OutputAnalyzer):
+    # Profiles every example on its own, so loading and validating the examples don't blur the profile.
+    # The profiler runs in the process that invokes the hooks, so, as MemoryAnalyzer, Program accepts it
+    # only when it runs examples in the main process (workers=1 and no isolation).
+    # Hooks of the analyzers listed after it run within the profile, so it should be the last of the analyzers using hooks
+    def __init__(self, directory: str = None, top_functions: int = 20, backend: Callable[[], ProfilerBackend] = CProfileBackend):
+        super().__init__()
+        self._directory = directory
+        self._top_functions = top_functions
+        self._backend = backend
+        self._running = {}
+        self._profiles = {}
+        self._items = []
+
+    def name(self):
+        return 'Profiling Analyzer'
+
+    def measures_in_process(self) -> bool:
+        return True
+
+    def before_test_case(self, test_case: AlgorithmTestCase):
+        profiler = self._backend()
+        self._running[test_case.key] = profiler
+        profiler.start()
+
+    def after_test_case(self, test_case: AlgorithmTestCase, algorithm_result):
+        profiler = self._running.pop(test_case.key)
+        profiler.stop()
+
+        artifacts = []
+        if self._directory is not None:
+            os.makedirs(self._directory, exist_ok=True)
+            artifacts = profiler.save(os.path.join(self._directory, file_name(test_case.key)))
+
+        # Only the summary of the profile is kept, the profile itself is in the artifacts
+        self._profiles[test_case.key] = {
+            'top_functions': profiler.top_functions(self._top_functions),
+            'artifacts': artifacts,
+        }
+
+    def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
+        return ProfilingAnalyzerResult(
+            [self._analyze_item(example) for example in examples if example.test_case.key in self._profiles]
+        )
+
+    def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
+        return self.analyze([example])
+
+    def update(self, example: ProgramResult):
+        if example.test_case.key in self._profiles:
+            self._items.append(self._analyze_item(example))
+            del self._profiles[example.test_case.key]
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return ProfilingAnalyzerResult(self._items)
+
+    def _analyze_item(self, example: ProgramResult) -> ProfilingAnalyzerResultItem:
+        profile = self._profiles[example.test_case.key]
+        return ProfilingAnalyzerResultItem(example.test_case, profile['top_functions'], profile['artifacts'])
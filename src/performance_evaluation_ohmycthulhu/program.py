@@ -1,61 +1,247 @@
-from typing import Callable
+import multiprocessing
+import queue
+import sys
+from collections import deque
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
 import owlready2 as owl
 from .examples import ExamplesManager, AlgorithmTestCase
-from .adapter import AlgorithmAdapter
+from .adapter import AlgorithmAdapter, CounterfactualExplanation
 from .program_result import ProgramResult
 from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .result_store import ResultStore
+from .isolation import IsolatedRunner
+from .cache import CachedAdapter
+from .dispatcher import CallbackDispatcher
+from . import worker
 
 
 class Program:
-    def __init__(self, algorithm: AlgorithmAdapter, analyzers: list[OutputAnalyzer], example_manager: ExamplesManager=None, callbacks: Callable[[list[OutputAnalyzerResult]], None] = None):
+    def __init__(
+        self,
+        algorithm: AlgorithmAdapter,
+        analyzers: list[OutputAnalyzer],
+        example_manager: ExamplesManager = None,
+        callbacks: Callable[[list[OutputAnalyzerResult]], None] = None,
+        workers: int = 1,
+        ontology_source: str = None,
+        result_store: ResultStore = None,
+        warmup: int = 0,
+        repetitions: int = 1,
+        timeout: float = None,
+        memory_limit: int = None,
+        callbacks_queue_size: int = 64,
+        keep_results: bool = True,
+        ontology_cache: str = None,
+        summarize: bool = False,
+    ):
+        if (workers > 1 or timeout is not None or memory_limit is not None) and ontology_source is None:
+            raise ValueError("Ontology source is required for running examples in several or isolated workers")
+        if repetitions < 1 or warmup < 0:
+            raise ValueError("At least one repetition is required and warmup runs can't be negative")
+        if isinstance(algorithm, CachedAdapter) and (warmup > 0 or repetitions > 1):
+            # Every run after the first one would hit the cache and repeat the first run's measurement
+            raise ValueError("Cached runs can't be repeated, the cache requires warmup=0 and repetitions=1")
+        if not keep_results and not summarize:
+            raise ValueError("Results can be released only when they are summarized")
+        if workers > 1 or timeout is not None or memory_limit is not None:
+            # Examples run by other processes can't be measured by hooks invoked in this one
+            for analyzer in analyzers:
+                if analyzer.measures_in_process():
+                    raise ValueError(f"{analyzer.name()} measures examples in the main process, it requires workers=1 without timeout and memory limit")
+
         self._examples_manager = example_manager if example_manager is not None else ExamplesManager()
         self._algorithm = algorithm
         self._analyzers = analyzers
         self._callbacks = callbacks if callbacks is not None else []
-
-    def run(self, examples: list[hash], ontology: owl.Ontology):
+        self._workers = workers
+        self._ontology_source = ontology_source
+        self._result_store = result_store
+        self._warmup = warmup
+        self._repetitions = repetitions
+        self._timeout = timeout
+        self._memory_limit = memory_limit
+        self._dispatcher = CallbackDispatcher(self._callbacks, callbacks_queue_size)
+        self._keep_results = keep_results
+        self._ontology_cache = ontology_cache
+        self._summarize = summarize
+        self._stored_keys = set()
+
+    def run(self, examples: Iterable[hash], ontology: owl.Ontology):
         self._load_examples(examples, ontology)
 
-        results = self._run_examples()
+        results = []
+        self._stored_keys = set()
+        with self._dispatcher:
+            # Stored results are restored once the examples have been gone through, only for the examples of this run
+            for result in chain(self._run_examples(), self._restore_results(ontology)):
+                # When summarizing, analyzers fold every result in as it comes, so it's released unless the results are kept
+                if self._summarize:
+                    self._update_analyzers(result)
+                if self._keep_results:
+                    results.append(result)
 
-        analyzes_result = self._analyze_results(results)
+        analyzes_result = self._finalize_analyzers() if self._summarize else self._analyze_results(results)
 
         return results, analyzes_result
 
-    def _load_examples(self, examples: list[hash], ontology: owl.Ontology):
+    def _load_examples(self, examples: Iterable[hash], ontology: owl.Ontology):
         return self._examples_manager.load(examples, ontology)
 
+    def _restore_results(self, ontology: owl.Ontology):
+        if self._result_store is None:
+            return
+
+        count = 0
+        for result in self._result_store.iterate(ontology, keys=self._stored_keys):
+            count += 1
+            yield result
+
+        print(f"Restored {count} stored examples from {self._result_store.path}")
+        # E.g. a store of another shard layout or of an edited examples file
+        skipped = len(self._result_store.keys() - self._stored_keys)
+        if skipped > 0:
+            print(f"Skipped {skipped} stored results of examples that aren't a part of this run", file=sys.stderr)
+
+    def _pending_examples(self):
+        for example in self._examples_manager.examples:
+            if self._result_store is not None and example.key in self._result_store:
+                self._stored_keys.add(example.key)
+                continue
+            yield example
+
     def _run_examples(self):
-        return [
+        if self._timeout is not None or self._memory_limit is not None:
+            return self._run_examples_isolated()
+        if self._workers > 1:
+            return self._run_examples_in_pool()
+
+        return (
             self._run_example(example)
-            for example in self._examples_manager.examples
-        ]
+            for example in self._pending_examples()
+        )
 
     def _run_example(self, example: AlgorithmTestCase):
         print(f"Running {example}")
         self._run_before_callback(example)
-        algorithm_result, meta = self._algorithm.run(example)
+        algorithm_result, meta = worker.run_repeatedly(self._algorithm, example, self._warmup, self._repetitions)
         self._run_after_callback(example, algorithm_result)
         example.destroy()
         result = ProgramResult(example, algorithm_result, meta)
-        self._invoke_callbacks(result)
+        self._finish_example(result)
+
+        return result
+
+    def _run_examples_in_pool(self):
+        # Spawned workers don't inherit the parent's world and load the ontology on their own
+        context = multiprocessing.get_context('spawn')
+        pending = deque()
+
+        with context.Pool(
+                self._workers,
+                initializer=worker.initialize_worker,
+                initargs=(self._algorithm, self._ontology_source, self._warmup, self._repetitions, self._ontology_cache),
+        ) as pool:
+            # Test cases are pulled one at a time and only a bounded window of them is in flight.
+            # Results are collected in the order of submission, so hooks and callbacks are invoked deterministically
+            for test_case in self._pending_examples():
+                pending.append((test_case, pool.apply_async(worker.run_example, (test_case.example,))))
+
+                if len(pending) >= self._workers * 2:
+                    yield self._collect_pending(pending)
+
+            while pending:
+                yield self._collect_pending(pending)
+
+    def _run_examples_isolated(self):
+        # Every thread borrows one of the isolated runners, so each runner executes a single example at a time
+        runners = queue.Queue()
+        for _ in range(self._workers):
+            runners.put(IsolatedRunner(
+                self._algorithm,
+                self._ontology_source,
+                timeout=self._timeout,
+                memory_limit=self._memory_limit,
+                warmup=self._warmup,
+                repetitions=self._repetitions,
+                ontology_cache=self._ontology_cache,
+            ))
+
+        def run_isolated(example: hash):
+            runner = runners.get()
+            try:
+                return runner.run(example)
+            finally:
+                runners.put(runner)
+
+        pending = deque()
+
+        try:
+            with ThreadPoolExecutor(self._workers) as executor:
+                for test_case in self._pending_examples():
+                    pending.append((test_case, executor.submit(run_isolated, test_case.example)))
+
+                    if len(pending) >= self._workers * 2:
+                        yield self._collect_pending(pending)
+
+                while pending:
+                    yield self._collect_pending(pending)
+        finally:
+            while not runners.empty():
+                runners.get().close()
+
+    def _collect_pending(self, pending: deque):
+        test_case, output = pending.popleft()
+        # Both pool's async results and futures are collected here
+        output = output.get() if hasattr(output, 'get') else output.result()
+        return self._collect_example(test_case, output)
+
+    def _collect_example(self, example: AlgorithmTestCase, output: hash):
+        print(f"Finished {example}")
+        algorithm_result = [
+            CounterfactualExplanation.from_dict(explanation, example.ontology)
+            for explanation in output['explanations']
+        ]
+        # The example has been run by another process, so the hooks aren't invoked for it.
+        # Its timer and counters are a part of the meta
+        result = ProgramResult(example, algorithm_result, output['meta'], output.get('status', ProgramResult.FINISHED))
+        self._finish_example(result)
 
         return result
 
-    def _invoke_callbacks(self, result: ProgramResult):
+    def _finish_example(self, result: ProgramResult):
+        if self._result_store is None and not self._dispatcher.has_callbacks:
+            # Nobody consumes the per-example analysis, the results are analyzed once all examples are done
+            return
+
         analysis = [analyzer.analyze_example(result) for analyzer in self._analyzers]
-        for callback in self._callbacks:
-            callback(analysis)
 
-    def _analyze_results(self, results):
+        if self._result_store is not None:
+            self._result_store.save(result, self._analyzers, analysis)
+
+        self._invoke_callbacks(analysis)
+
+    def _invoke_callbacks(self, analysis: list[OutputAnalyzerResult]):
+        self._dispatcher.dispatch(analysis)
+
+    def _update_analyzers(self, result: ProgramResult):
+        for analyzer in self._analyzers:
+            analyzer.update(result)
+
+    def _analyze_results(self, results: list[ProgramResult]):
         return [analyzer.analyze(results) for analyzer in self._analyzers]
 
+    def _finalize_analyzers(self):
+        return [analyzer.finalize() for analyzer in self._analyzers]
+
     def _run_before_callback(self, example: AlgorithmTestCase):
         for analyzer in self._analyzers:
             analyzer.before_test_case(example)
 
     def _run_after_callback(self, example: AlgorithmTestCase, run_result):
-        for analyzer in self._analyzers:
+        # Hooks are nested, so an analyzer started after another one is stopped before it and doesn't measure its work
+        for analyzer in reversed(self._analyzers):
             analyzer.after_test_case(example, run_result)
 
 
@@ -3,10 +3,16 @@ from .adapter import CounterfactualExplanation
 
 
 class ProgramResult:
-    def __init__(self, test_case: AlgorithmTestCase, explanations: list[CounterfactualExplanation], meta: hash):
+    FINISHED = 'finished'
+    TIMEOUT = 'timeout'
+    MEMORY_EXCEEDED = 'memory_exceeded'
+    CRASHED = 'crashed'
+
+    def __init__(self, test_case: AlgorithmTestCase, explanations: list[CounterfactualExplanation], meta: hash, status: str = FINISHED):
         self._test_case = test_case
         self._explanations = explanations
         self._meta = meta
+        self._status = status
 
     @property
     def test_case(self) -> AlgorithmTestCase:
@@ -19,3 +25,11 @@ class ProgramResult:
     @property
     def meta(self):
         return self._meta
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def is_finished(self) -> bool:
+        return self._status == self.FINISHED
@@ -0,0 +1,247 @@
+import numpy as np
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult, OutputAnalyzerSummary
+from .program_result import ProgramResult
+from .adapter import CounterfactualExplanation
+from .stats import StreamingSummary
+
+
+def dissimilarity_matrix(explanations: list[CounterfactualExplanation]) -> np.ndarray:
+    # Dissimilarity of two counterfactuals is the number of changes present in only one of them.
+    # Explanations are encoded as rows of an incidence matrix of distinct changes, so |A xor B| = |A| + |B| - 2|A and B|
+    columns = {}
+    rows, cols = [], []
+    for row, explanation in enumerate(explanations):
+        occurrences = {}
+        for change in explanation.changed_assertions:
+            # Repeated changes are distinct columns, so explanations are compared as multisets
+            signature = change.signature
+            occurrences[signature] = occurrences.get(signature, 0) + 1
+            rows.append(row)
+            cols.append(columns.setdefault((signature, occurrences[signature]), len(columns)))
+
+    incidence = np.zeros((len(explanations), len(columns)), dtype=np.float64)
+    incidence[rows, cols] = 1.0
+    sizes = incidence.sum(axis=1)
+    shared = incidence @ incidence.T
+
+    return sizes[:, None] + sizes[None, :] - 2 * shared
+
+
+def similarity_kernel(dissimilarity: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + dissimilarity)
+
+
+def log_determinant(kernel: np.ndarray) -> float:
+    # Determinants of large kernels under- or overflow, so the diversity is reported in log-space.
+    # A singular kernel (e.g. duplicated explanations) has no diversity at all
+    if kernel.shape[0] == 0:
+        return 0.0
+    sign, value = np.linalg.slogdet(kernel)
+    return float(value) if sign > 0 else float('-inf')
+
+
+def greedy_dpp(kernel: np.ndarray, k: int, epsilon: float = 1e-10) -> list[int]:
+    # Greedy MAP inference of a determinantal point process with incremental Cholesky updates:
+    # every step picks the item adding the most to the log-determinant of the selection, O(n * k^2) in total
+    size = kernel.shape[0]
+    k = min(k, size)
+    factors = np.zeros((k, size))
+    gains = np.diag(kernel).astype(np.float64).copy()
+    selected = []
+
+    while len(selected) < k:
+        candidate = int(np.argmax(gains))
+        if gains[candidate] <= epsilon:
+            # The rest of the items are (numerically) spanned by the selection
+            break
+
+        step = len(selected)
+        factors[step] = (kernel[candidate] - factors[:step, candidate] @ factors[:step]) / np.sqrt(gains[candidate])
+        gains -= factors[step] ** 2
+        gains[candidate] = -np.inf
+        selected.append(candidate)
+
+    return selected
+
+
+def describe(values: np.ndarray) -> hash:
+    if values.size == 0:
+        return {'count': 0, 'min': None, 'median': None, 'mean': None, 'p95': None, 'stddev': None}
+
+    return {
+        'count': int(values.size),
+        'min': float(values.min()),
+        'median': float(np.median(values)),
+        'mean': float(values.mean()),
+        'p95': float(np.percentile(values, 95)),
+        'stddev': float(values.std(ddof=1)) if values.size > 1 else 0.0,
+    }
+
+
+class QualityAnalyzerResultItem:
+    def __init__(self, test_case, count: int, log_det: float, mean_dissimilarity: float, top_k: list[int],
+                 top_k_log_det: float, proximity: hash, sparcity: hash):
+        self._test_case = test_case
+        self._count = count
+        self._log_det = log_det
+        self._mean_dissimilarity = mean_dissimilarity
+        self._top_k = top_k
+        self._top_k_log_det = top_k_log_det
+        self._proximity = proximity
+        self._sparcity = sparcity
+
+    @property
+    def test_case(self):
+        return self._test_case
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def log_det(self):
+        return self._log_det
+
+    @property
+    def mean_dissimilarity(self):
+        return self._mean_dissimilarity
+
+    @property
+    def top_k(self):
+        return self._top_k
+
+    @property
+    def top_k_log_det(self):
+        return self._top_k_log_det
+
+    @property
+    def proximity(self):
+        return self._proximity
+
+    @property
+    def sparcity(self):
+        return self._sparcity
+
+    def to_records(self) -> list[hash]:
+        return [{
+            'key': self._test_case.key,
+            'count': self._count,
+            'log_det': self._log_det,
+            'mean_dissimilarity': self._mean_dissimilarity,
+            'top_k': self._top_k,
+            'top_k_log_det': self._top_k_log_det,
+            **{f"proximity_{field}": value for field, value in self._proximity.items() if field != 'count'},
+            **{f"sparcity_{field}": value for field, value in self._sparcity.items() if field != 'count'},
+        }]
+
+    def __str__(self):
+        return f"Example ({self._test_case.key}): {self._test_case}\n" \
+               f"Explanations: {self._count}\n" \
+               f"Diversity (log det): {self._str_value(self._log_det)}, mean dissimilarity: {self._str_value(self._mean_dissimilarity)}\n" \
+               f"Most diverse explanations: {self._top_k} (log det {self._str_value(self._top_k_log_det)})\n" \
+               f"Proximity: {self._str_distribution(self._proximity)}\n" \
+               f"Sparcity: {self._str_distribution(self._sparcity)}"
+
+    @staticmethod
+    def _str_value(value):
+        return 'n/a' if value is None else value
+
+    @staticmethod
+    def _str_distribution(distribution: hash):
+        if distribution['count'] == 0:
+            return 'n/a'
+        return f"min {distribution['min']}, median {distribution['median']}, mean {distribution['mean']}, " \
+               f"p95 {distribution['p95']}, stddev {distribution['stddev']}"
+
+
+class QualityAnalyzerResult(OutputAnalyzerResult):
+    def __init__(self, items: list[QualityAnalyzerResultItem]):
+        self._items = items
+
+    @property
+    def items(self):
+        return self._items
+
+    def to_records(self) -> list[hash]:
+        return [record for item in self._items for record in item.to_records()]
+
+    def __str__(self):
+        return "Quality analysis:\n" + ('\n' + '*' * 10 + '\n').join([str(x) for x in self._items])
+
+
+class QualityAnalyzerSummary(OutputAnalyzerSummary):
+    def __init__(self, counters: hash, metrics: dict[str, StreamingSummary]):
+        super().__init__('Quality summary', counters, metrics)
+
+
+class QualityAnalyzer(OutputAnalyzer):
+    # Diversity is det(A), A[i, j] = 1 / (1 + dist(x_i, x_j)), where dist is the dissimilarity of the counterfactuals (see Metrics.md)
+    def __init__(self, top_k: int = 5):
+        super().__init__()
+        self._top_k = top_k
+        self._counters = {
+            'examples': 0,
+            'interrupted examples': 0,
+            'examples with fewer than 2 explanations': 0,
+            'examples without diversity': 0,
+        }
+        self._metrics = {}
+
+    def name(self):
+        return 'Quality Analyzer'
+
+    def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
+        return QualityAnalyzerResult(
+            [self._analyze_item(example) for example in examples]
+        )
+
+    def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
+        return QualityAnalyzerResult([self._analyze_item(example)])
+
+    def update(self, example: ProgramResult):
+        if not example.is_finished:
+            # Explanations of an interrupted run are incomplete, they would skew the quality
+            self._counters['interrupted examples'] += 1
+            return
+
+        item = self._analyze_item(example)
+        self._counters['examples'] += 1
+
+        if item.log_det is None:
+            self._counters['examples with fewer than 2 explanations'] += 1
+        elif np.isfinite(item.log_det):
+            self._add_metric('log det', item.log_det)
+        else:
+            self._counters['examples without diversity'] += 1
+        if item.mean_dissimilarity is not None:
+            self._add_metric('mean dissimilarity', item.mean_dissimilarity)
+        self._add_metric('explanations', item.count)
+        for explanation in example.result:
+            self._add_metric('proximity', explanation.proximity)
+            self._add_metric('sparcity', explanation.sparcity)
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return QualityAnalyzerSummary(dict(self._counters), self._metrics)
+
+    def _add_metric(self, name: str, value: float):
+        self._metrics.setdefault(name, StreamingSummary()).add(value)
+
+    def _analyze_item(self, example: ProgramResult) -> QualityAnalyzerResultItem:
+        explanations = example.result
+        dissimilarity = dissimilarity_matrix(explanations)
+        kernel = similarity_kernel(dissimilarity)
+        top_k = greedy_dpp(kernel, self._top_k)
+        count = len(explanations)
+
+        return QualityAnalyzerResultItem(
+            test_case=example.test_case,
+            count=count,
+            # The log det of fewer than 2 explanations is 0, the highest possible, though there is nothing to be diverse
+            log_det=log_determinant(kernel) if count > 1 else None,
+            # The mean over distinct pairs, the diagonal is zero
+            mean_dissimilarity=float(dissimilarity.sum() / (count * (count - 1))) if count > 1 else None,
+            top_k=top_k,
+            top_k_log_det=log_determinant(kernel[np.ix_(top_k, top_k)]) if len(top_k) > 1 else None,
+            proximity=describe(np.array([explanation.proximity for explanation in explanations], dtype=np.float64)),
+            sparcity=describe(np.array([explanation.sparcity for explanation in explanations], dtype=np.float64)),
+        )
@@ -1,7 +1,9 @@
+from collections import Counter
 from typing import Union
-from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult, OutputAnalyzerSummary
 from .program_result import ProgramResult
-from .adapter import CounterfactualExplanation, AssertionChange
+from .adapter import CounterfactualExplanation
+from .stats import StreamingSummary
 
 
 class RankingAnalyzerResultItem:
@@ -10,6 +12,27 @@ class RankingAnalyzerResultItem:
         self._explanations = explanations
         self._test_case = test_case
 
+    @property
+    def ranks(self):
+        return self._ranks
+
+    @property
+    def test_case(self):
+        return self._test_case
+
+    def to_records(self) -> list[hash]:
+        return [
+            {
+                'key': self._test_case.key,
+                'rank': index,
+                'proximity': explanation.proximity,
+                'sparcity': explanation.sparcity,
+                'is_expected': index in self._ranks,
+                'changes': str(explanation),
+            }
+            for index, explanation in enumerate(self._explanations)
+        ]
+
     def __str__(self):
         return f"Example ({self._test_case.key}): {self._test_case}\nRanking:\n{self.__str_explanations__()}"
 
@@ -27,14 +50,62 @@ class RankingAnalyzerResult(OutputAnalyzerResult):
     def __init__(self, items: list[RankingAnalyzerResultItem]):
         self._items = items
 
+    @property
+    def items(self):
+        return self._items
+
+    def to_records(self) -> list[hash]:
+        return [record for item in self._items for record in item.to_records()]
+
     def __str__(self):
         return "Ranking analysis:\n" + ('\n' + '*' * 10 + '\n').join([str(x) for x in self._items])
 
 
+class RankingAnalyzerSummary(OutputAnalyzerSummary):
+    def __init__(self, counters: hash, metrics: dict[str, StreamingSummary]):
+        super().__init__('Ranking summary', counters, metrics)
+
+
 class RankingAnalyzer(OutputAnalyzer):
+    def __init__(self):
+        super().__init__()
+        self._counters = {
+            'examples': 0,
+            'interrupted examples': 0,
+            'examples with expected outcomes': 0,
+            'examples with expected explanation': 0,
+        }
+        self._metrics = {
+            'explanations': StreamingSummary(),
+            'first expected rank': StreamingSummary(),
+            'reciprocal rank': StreamingSummary(),
+        }
+
     def name(self):
         return 'Ranking Analyzer'
 
+    def update(self, example: ProgramResult):
+        if not example.is_finished:
+            # An interrupted run has found no or only some explanations, it isn't ranked
+            self._counters['interrupted examples'] += 1
+            return
+
+        self._counters['examples'] += 1
+        self._metrics['explanations'].add(len(example.result))
+        if not example.test_case.expected_changes:
+            return
+
+        ranks = self._get_ranks(example.result, example.test_case.expected_changes)
+        self._counters['examples with expected outcomes'] += 1
+        # Reciprocal rank is zero when none of the expected explanations has been found
+        self._metrics['reciprocal rank'].add(1 / (ranks[0] + 1) if ranks else 0.0)
+        if ranks:
+            self._counters['examples with expected explanation'] += 1
+            self._metrics['first expected rank'].add(ranks[0])
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return RankingAnalyzerSummary(dict(self._counters), self._metrics)
+
     def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
         return RankingAnalyzerResult(
             [self._analyze_item(example) for example in examples]
@@ -51,59 +122,42 @@ class RankingAnalyzer(OutputAnalyzer):
         )
 
     def _get_ranks(self, explanations: list[CounterfactualExplanation], expectations: hash) -> list[int]:
+        # Expected outcomes are compiled once, so every explanation is matched by a single lookup
+        expected_signatures = set(
+            self._expected_signature(expected_explanation['modifications'])
+            for expected_explanation in expectations
+        )
+
         return [
             index
             for index, explanation in enumerate(explanations)
-            if self._is_explanation_expected(explanation, expectations)
+            if self._explanation_signature(explanation) in expected_signatures
         ]
 
-    def _is_explanation_expected(self, explanation: CounterfactualExplanation, expected_explanations: list[hash]) -> bool:
-        for expected_explanation in expected_explanations:
-            if self._are_assertions_expected(explanation.changed_assertions, expected_explanation['modifications']):
-                return True
-
-        return False
-
-    def _are_assertions_expected(self, changed: list[AssertionChange], expected: list[hash]):
-        assertions_left = list(expected)
-
-        for changed_assertion in changed:
-            if len(assertions_left) == 0:
-                return False
-
-            expected_assertion = self._find_expected_assertion(changed_assertion, assertions_left)
-
-            if expected_assertion is None:
-                return False
+    @classmethod
+    def _explanation_signature(cls, explanation: CounterfactualExplanation) -> frozenset:
+        return cls._multiset(change.signature for change in explanation.changed_assertions)
 
-            assertions_left.remove(expected_assertion)
+    @classmethod
+    def _expected_signature(cls, modifications: list[hash]) -> frozenset:
+        # Expected changes are described the same way as `AssertionChange.signature`:
+        # - type of change
+        # - property that has been changed
+        # - what is the final value, either missing, single value or list compared as a set
+        return cls._multiset(
+            (change['type'], change['property'], cls._value_signature(change.get('value')))
+            for change in modifications
+        )
 
-        return len(assertions_left) == 0
+    @staticmethod
+    def _value_signature(value):
+        if not value:
+            return None
+        if isinstance(value, Union[list, tuple]):
+            return frozenset(value)
+        return value
 
     @staticmethod
-    def _find_expected_assertion(changed_assertion: AssertionChange, expected_pool: list[hash]):
-        # The change is performed in three stages:
-        # - type of change
-        # - property that has been changed
-        # - what is the final value
-        # depending on the type of the change, value may not be present
-        # depending on the type of property, value may be either list or single value
-        for expected_change in expected_pool:
-            if expected_change['type'] != changed_assertion.type:
-                continue
-            if expected_change['property'] != changed_assertion.changed_property.iri:
-                continue
-            if not ('value' in expected_change or changed_assertion.value):
-                return expected_change
-
-            # Check whether value is iterable
-            if isinstance(changed_assertion.value, Union[list, tuple]):
-                # If they are, check them as sets
-                if set(expected_change['value']) == set(value.iri for value in changed_assertion.value):
-                    return expected_change
-            else:
-                # Otherwise, check directly
-                if expected_change['value'] == changed_assertion.value.iri:
-                    return expected_change
-
-        return None
+    def _multiset(signatures) -> frozenset:
+        # Changes are matched regardless of their order, but every expected change has to be matched once
+        return frozenset(Counter(signatures).items())
@@ -0,0 +1,194 @@
+import json
+import statistics
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .program_result import ProgramResult
+from .performance_analyzer import measure_samples
+from .stats import permutation_test
+
+TOTAL_STAGE = 'total'
+
+
+class Baseline:
+    # Per-example timings of a reference run: {key: {stage: [durations]}}, where the stage is either
+    # the whole run or a stage of the algorithm
+    def __init__(self, timings: hash):
+        self._timings = timings
+
+    @property
+    def timings(self):
+        return self._timings
+
+    @classmethod
+    def from_results(cls, results: list[ProgramResult]):
+        return cls({
+            result.test_case.key: cls._stages(result)
+            for result in results if result.is_finished
+        })
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as file:
+            return cls(json.load(file))
+
+    def save(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self._timings, file, indent=2)
+
+    def __contains__(self, key):
+        return key in self._timings
+
+    def __getitem__(self, key):
+        return self._timings[key]
+
+    @staticmethod
+    def _stages(result: ProgramResult) -> hash:
+        samples = measure_samples(result)
+        return {TOTAL_STAGE: samples['total'], **samples['stages']}
+
+
+class RegressionAnalyzerResultItem:
+    def __init__(self, key, stage: str, baseline: float, current: float, change: float, p_value, is_regression: bool,
+                 is_inconclusive: bool = False):
+        self._key = key
+        self._stage = stage
+        self._baseline = baseline
+        self._current = current
+        self._change = change
+        self._p_value = p_value
+        self._is_regression = is_regression
+        self._is_inconclusive = is_inconclusive
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def stage(self):
+        return self._stage
+
+    @property
+    def baseline(self):
+        return self._baseline
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def change(self):
+        return self._change
+
+    @property
+    def p_value(self):
+        return self._p_value
+
+    @property
+    def is_regression(self):
+        return self._is_regression
+
+    @property
+    def is_inconclusive(self):
+        return self._is_inconclusive
+
+    def to_record(self) -> hash:
+        return {
+            'key': self._key,
+            'stage': self._stage,
+            'baseline': self._baseline,
+            'current': self._current,
+            'change': self._change,
+            'p_value': self._p_value,
+            'is_regression': self._is_regression,
+            'is_inconclusive': self._is_inconclusive,
+        }
+
+    def __str__(self):
+        p_value = 'n/a' if self._p_value is None else round(self._p_value, 4)
+        label = 'REGRESSION ' if self._is_regression else 'INCONCLUSIVE ' if self._is_inconclusive else ''
+        return f"{label}{self._key} ({self._stage}): " \
+               f"{self._baseline} => {self._current} ({self._change:+.1%}, p-value {p_value})"
+
+
+class RegressionAnalyzerResult(OutputAnalyzerResult):
+    def __init__(self, items: list[RegressionAnalyzerResultItem]):
+        self._items = items
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def regressions(self) -> list[RegressionAnalyzerResultItem]:
+        return [item for item in self._items if item.is_regression]
+
+    @property
+    def inconclusive(self) -> list[RegressionAnalyzerResultItem]:
+        return [item for item in self._items if item.is_inconclusive]
+
+    def to_records(self) -> list[hash]:
+        return [item.to_record() for item in self._items]
+
+    def __str__(self):
+        regressions = self.regressions
+        inconclusive = self.inconclusive
+        header = f"Regression analysis: {len(regressions)} regressions in {len(self._items)} compared stages" \
+                 f"{f', {len(inconclusive)} inconclusive slowdowns' if inconclusive else ''}"
+        return "\n".join([header, *[str(item) for item in [*regressions, *inconclusive]]])
+
+
+class RegressionAnalyzer(OutputAnalyzer):
+    # A stage regresses when its median duration grows by more than the threshold and the slowdown is significant by a permutation test.
+    # The test requires several repetitions in both runs, a slowdown of a single run is run-to-run noise as likely, so it's only inconclusive
+    def __init__(self, baseline: Baseline, threshold: float = 0.1, significance: float = 0.05):
+        super().__init__()
+        self._baseline = baseline
+        self._threshold = threshold
+        self._significance = significance
+        self._items = []
+
+    def name(self):
+        return 'Regression Analyzer'
+
+    def analyze(self, examples: list[ProgramResult]) -> OutputAnalyzerResult:
+        return RegressionAnalyzerResult([
+            item
+            for example in examples if example.is_finished and example.test_case.key in self._baseline
+            for item in self._analyze_item(example)
+        ])
+
+    def analyze_example(self, example: ProgramResult) -> OutputAnalyzerResult:
+        return self.analyze([example])
+
+    def update(self, example: ProgramResult):
+        # Compared stages are small records, they are kept so every regression can be reported at the end
+        self._items += self.analyze([example]).items
+
+    def finalize(self) -> OutputAnalyzerResult:
+        return RegressionAnalyzerResult(self._items)
+
+    def _analyze_item(self, example: ProgramResult) -> list[RegressionAnalyzerResultItem]:
+        baseline = self._baseline[example.test_case.key]
+        current = Baseline.from_results([example])[example.test_case.key]
+
+        return [
+            self._compare(example.test_case.key, stage, baseline[stage], samples)
+            for stage, samples in current.items() if stage in baseline
+        ]
+
+    def _compare(self, key, stage: str, baseline: list[float], current: list[float]) -> RegressionAnalyzerResultItem:
+        baseline_median = statistics.median(baseline)
+        current_median = statistics.median(current)
+        change = current_median / baseline_median - 1 if baseline_median > 0 else 0.0
+        p_value = permutation_test(baseline, current) if len(baseline) > 1 and len(current) > 1 else None
+        is_slower = change > self._threshold
+
+        return RegressionAnalyzerResultItem(
+            key=key,
+            stage=stage,
+            baseline=baseline_median,
+            current=current_median,
+            change=change,
+            p_value=p_value,
+            is_regression=is_slower and p_value is not None and p_value < self._significance,
+            is_inconclusive=is_slower and p_value is None,
+        )
@@ -0,0 +1,103 @@
+import json
+import os
+import owlready2 as owl
+from typing import Iterator
+from .adapter import CounterfactualExplanation
+from .examples import AlgorithmTestCase
+from .ontology_index import OntologyIndex
+from .output_analyzer import OutputAnalyzer, OutputAnalyzerResult
+from .program_result import ProgramResult
+
+
+class ResultStore:
+    # Append-only JSON Lines file with one record per finished example.
+    # Every record is flushed to disk right away, so an interrupted run loses at most the example in progress.
+    # With `retry_failed`, examples stored as interrupted (timeout, memory exceeded, crashed) don't count as stored, so they are run again.
+    # A run appends a new record of the example, the last record of every key is the one restored
+    def __init__(self, path: str, retry_failed: bool = False):
+        self._path = path
+        self._retry_failed = retry_failed
+        self._terminate_last_record()
+        self._statuses = {}
+        self._positions = {}
+        self._count = 0
+        for record in self.records():
+            self._add(record)
+
+    @property
+    def path(self):
+        return self._path
+
+    def keys(self) -> set:
+        return set(key for key, status in self._statuses.items() if not self._retry_failed or status == ProgramResult.FINISHED)
+
+    def __contains__(self, key):
+        return key in self._statuses and (not self._retry_failed or self._statuses[key] == ProgramResult.FINISHED)
+
+    def save(self, result: ProgramResult, analyzers: list[OutputAnalyzer], analysis: list[OutputAnalyzerResult]):
+        record = {
+            'key': result.test_case.key,
+            'example': result.test_case.example,
+            'status': result.status,
+            'explanations': [explanation.to_dict() for explanation in result.result],
+            'meta': result.meta,
+            'analysis': {
+                analyzer.name(): str(analyzer_result)
+                for analyzer, analyzer_result in zip(analyzers, analysis)
+            },
+        }
+
+        self.write(record)
+
+    def write(self, record: hash):
+        with open(self._path, 'a') as file:
+            file.write(json.dumps(record, default=str) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+        self._add(record)
+
+    def _add(self, record: hash):
+        self._statuses[record['key']] = record.get('status', ProgramResult.FINISHED)
+        self._positions[record['key']] = self._count
+        self._count += 1
+
+    def records(self) -> Iterator[hash]:
+        if not os.path.exists(self._path):
+            return
+
+        with open(self._path) as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut short if the run has been interrupted while writing
+                    continue
+
+    def _terminate_last_record(self):
+        # A record cut short by an interruption is terminated, so the next record starts on its own line
+        if not os.path.exists(self._path) or os.path.getsize(self._path) == 0:
+            return
+
+        with open(self._path, 'rb+') as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                file.write(b"\n")
+
+    def load(self, ontology: owl.Ontology, index: OntologyIndex = None, keys: set = None) -> list[ProgramResult]:
+        return list(self.iterate(ontology, index, keys))
+
+    def iterate(self, ontology: owl.Ontology, index: OntologyIndex = None, keys: set = None) -> Iterator[ProgramResult]:
+        # Results are restored one at a time, so they can be released once processed. Given keys, other records are skipped.
+        # Records superseded by a later run of the same example are skipped too
+        index = index if index is not None else OntologyIndex(ontology)
+
+        for position, record in enumerate(self.records()):
+            if self._positions.get(record['key']) != position or keys is not None and record['key'] not in keys:
+                continue
+            yield ProgramResult(
+                AlgorithmTestCase(record['example'], ontology, index),
+                [CounterfactualExplanation.from_dict(explanation, ontology) for explanation in record['explanations']],
+                record['meta'],
+                record.get('status', ProgramResult.FINISHED),
+            )
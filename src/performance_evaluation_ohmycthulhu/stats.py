@@ -0,0 +1,182 @@
+import math
+import random
+import statistics
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    # Linear interpolation between the closest ranks
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def bootstrap_interval(values: list[float], confidence: float = 0.95, resamples: int = 1000, seed: int = 0) -> tuple[float, float]:
+    # Percentile bootstrap confidence interval of the mean.
+    # The seed is fixed, so the same measurements always produce the same interval
+    generator = random.Random(seed)
+    means = [
+        statistics.fmean(generator.choices(values, k=len(values)))
+        for _ in range(resamples)
+    ]
+    tail = (1 - confidence) / 2
+    return percentile(means, tail), percentile(means, 1 - tail)
+
+
+def summarize(values: list[float], confidence: float = 0.95, resamples: int = 1000) -> hash:
+    ci_low, ci_high = bootstrap_interval(values, confidence, resamples)
+
+    return {
+        'count': len(values),
+        'min': min(values),
+        'median': statistics.median(values),
+        'mean': statistics.fmean(values),
+        'p95': percentile(values, 0.95),
+        'stddev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+    }
+
+
+def permutation_test(baseline: list[float], current: list[float], resamples: int = 2000, seed: int = 0) -> float:
+    # One-sided p-value of the current mean being greater than the baseline mean only by chance
+    observed = statistics.fmean(current) - statistics.fmean(baseline)
+    pooled = list(baseline) + list(current)
+    generator = random.Random(seed)
+    extreme = 0
+
+    for _ in range(resamples):
+        generator.shuffle(pooled)
+        difference = statistics.fmean(pooled[len(baseline):]) - statistics.fmean(pooled[:len(baseline)])
+        if difference >= observed:
+            extreme += 1
+
+    return (extreme + 1) / (resamples + 1)
+
+
+class RunningStatistics:
+    # Welford's online mean and variance, states accumulated separately can be merged
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'RunningStatistics'):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class QuantileSketch:
+    # Values are counted in logarithmic buckets of their magnitude, so quantiles are estimated within the relative accuracy
+    # using memory that grows with the range of values rather than with their number. Sketches can be merged
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._buckets = {}
+        # Negative values (e.g. log-determinants) are counted by their magnitude in a mirrored set of buckets
+        self._negative_buckets = {}
+        self._zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value == 0:
+            self._zeros += 1
+            return
+
+        buckets = self._buckets if value > 0 else self._negative_buckets
+        bucket = math.ceil(math.log(abs(value), self._gamma))
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    def merge(self, other: 'QuantileSketch'):
+        if other._gamma != self._gamma:
+            raise ValueError("Sketches with different accuracy can't be merged")
+
+        self.count += other.count
+        self._zeros += other._zeros
+        for buckets, other_buckets in ((self._buckets, other._buckets), (self._negative_buckets, other._negative_buckets)):
+            for bucket, count in other_buckets.items():
+                buckets[bucket] = buckets.get(bucket, 0) + count
+
+    def quantile(self, fraction: float) -> float:
+        if self.count == 0:
+            return None
+
+        rank = fraction * (self.count - 1)
+        # Ascending order: negative values from the largest magnitude, zeros, then positive values from the smallest one
+        ordered = [
+            *((-self._value(bucket), self._negative_buckets[bucket]) for bucket in sorted(self._negative_buckets, reverse=True)),
+            (0.0, self._zeros),
+            *((self._value(bucket), self._buckets[bucket]) for bucket in sorted(self._buckets)),
+        ]
+
+        seen = 0
+        for value, count in ordered:
+            seen += count
+            if rank < seen:
+                return value
+
+        return next(value for value, count in reversed(ordered) if count > 0)
+
+    def _value(self, bucket: int) -> float:
+        # The middle of the bucket, which is within the relative accuracy of any value in it
+        return 2 * self._gamma ** bucket / (self._gamma + 1)
+
+
+class StreamingSummary:
+    # Summary of a stream of values in the shape of `summarize`, without keeping the values.
+    # The confidence interval of the mean is the normal approximation instead of a bootstrap one
+    def __init__(self, relative_accuracy: float = 0.01):
+        self._statistics = RunningStatistics()
+        self._sketch = QuantileSketch(relative_accuracy)
+
+    @property
+    def count(self) -> int:
+        return self._statistics.count
+
+    def add(self, value: float):
+        self._statistics.add(value)
+        self._sketch.add(value)
+
+    def merge(self, other: 'StreamingSummary'):
+        self._statistics.merge(other._statistics)
+        self._sketch.merge(other._sketch)
+
+    def summary(self, confidence: float = 0.95) -> hash:
+        if self.count == 0:
+            return {'count': 0, 'min': None, 'median': None, 'mean': None, 'p95': None, 'stddev': None, 'ci_low': None, 'ci_high': None}
+
+        margin = statistics.NormalDist().inv_cdf((1 + confidence) / 2) * self._statistics.stddev / math.sqrt(self.count)
+
+        return {
+            'count': self.count,
+            'min': self._statistics.min,
+            # Estimates are clamped, so they don't leave the observed range because of the bucket width
+            'median': min(max(self._sketch.quantile(0.5), self._statistics.min), self._statistics.max),
+            'mean': self._statistics.mean,
+            'p95': min(max(self._sketch.quantile(0.95), self._statistics.min), self._statistics.max),
+            'stddev': self._statistics.stddev,
+            'ci_low': self._statistics.mean - margin,
+            'ci_high': self._statistics.mean + margin,
+        }
@@ -0,0 +1,176 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# The tracer of the run in progress. Algorithms open spans through `span`, without the tracer being passed down to them
+_tracer: ContextVar = ContextVar('tracer', default=None)
+# Functions called when a top-level span (a stage) opens and right before it closes, e.g. to measure the peak memory of every stage
+_stage_listeners: list = []
+
+
+class Span:
+    # A handle of a span being recorded. The span itself is a plain dictionary, so it can be stored and sent between processes:
+    # {'name', 'start', 'end', 'attributes', 'children'}, with `end` None while it's open. Timestamps are `perf_counter` seconds,
+    # monotonic and of the highest resolution; the tracer's `epoch` added to them gives seconds since the epoch
+    def __init__(self, record: hash):
+        self._record = record
+
+    @property
+    def name(self):
+        return self._record['name']
+
+    @property
+    def start(self):
+        return self._record['start']
+
+    @property
+    def end(self):
+        return self._record['end']
+
+    @property
+    def attributes(self):
+        return self._record['attributes']
+
+    def set_attribute(self, name: str, value):
+        self._record['attributes'][name] = value
+
+
+class Tracer:
+    # Records nested spans of a single run. Spans are appended as soon as they are opened,
+    # so the spans of an interrupted run are available up to the moment it has been interrupted
+    def __init__(self):
+        self._spans = []
+        self._open = []
+        self._epoch = time.time() - time.perf_counter()
+
+    @property
+    def spans(self) -> list[hash]:
+        return self._spans
+
+    @property
+    def epoch(self) -> float:
+        return self._epoch
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        record = {'name': name, 'start': time.perf_counter(), 'end': None, 'attributes': attributes, 'children': []}
+        is_stage = not self._open
+        (self._open[-1]['children'] if self._open else self._spans).append(record)
+        self._open.append(record)
+        if is_stage:
+            _notify_stage_listeners('open', record)
+        try:
+            yield Span(record)
+        finally:
+            if is_stage:
+                _notify_stage_listeners('close', record)
+            record['end'] = time.perf_counter()
+            self._open.pop()
+
+    @contextmanager
+    def activate(self):
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    # Records a span into the active tracer. Without one, e.g. when the algorithm is run on its own, nothing is recorded
+    tracer = _tracer.get()
+    if tracer is None:
+        yield Span({'name': name, 'start': None, 'end': None, 'attributes': attributes, 'children': []})
+        return
+
+    with tracer.span(name, **attributes) as current:
+        yield current
+
+
+def add_stage_listener(listener):
+    # The listener is called with the event ('open' or 'close') and the span's record, within the stage's interval
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    _stage_listeners.remove(listener)
+
+
+def _notify_stage_listeners(event: str, record: hash):
+    for listener in _stage_listeners:
+        listener(event, record)
+
+
+def measure_stages(meta: hash) -> list[hash]:
+    # Stages of a run: its top-level spans, or the intervals between consecutive checkpoints of runs recorded before spans.
+    # Spans left open by an interrupted run are skipped
+    if meta.get('spans'):
+        return [
+            {'stage': record['name'], 'begin': record['start'], 'end': record['end'], 'duration': record['end'] - record['start']}
+            for record in meta['spans'] if record['end'] is not None
+        ]
+
+    points = list(meta.get('checkpoints', {}).items())
+    return [
+        {'stage': f"{start_pos[0]} => {end_pos[0]}", 'begin': start_pos[1], 'end': end_pos[1], 'duration': end_pos[1] - start_pos[1]}
+        for start_pos, end_pos in zip(points[:-1], points[1:])
+    ]
+
+
+def summarize_spans(spans: list[hash]) -> list[hash]:
+    # Sibling spans of the same name are merged, so thousands of reasoner calls make a single node of the tree:
+    # {'name', 'count', 'total', 'max', 'children'} with the merged children of all of them
+    nodes = {}
+    for record in spans:
+        if record['end'] is None:
+            continue
+        duration = record['end'] - record['start']
+        node = nodes.setdefault(record['name'], {'name': record['name'], 'count': 0, 'total': 0.0, 'max': 0.0, 'spans': []})
+        node['count'] += 1
+        node['total'] += duration
+        node['max'] = max(node['max'], duration)
+        node['spans'].extend(record['children'])
+
+    return [
+        {'name': node['name'], 'count': node['count'], 'total': node['total'], 'max': node['max'], 'children': summarize_spans(node['spans'])}
+        for node in nodes.values()
+    ]
+
+
+def render_spans(spans: list[hash]) -> list[str]:
+    return _render_nodes(summarize_spans(spans), '')
+
+
+def _render_nodes(nodes: list[hash], indent: str) -> list[str]:
+    lines = []
+    for node in nodes:
+        if node['count'] == 1:
+            lines.append(f"{indent}{node['name']}: {round(node['total'], 6)}")
+        else:
+            lines.append(f"{indent}{node['name']} x{node['count']}: total {round(node['total'], 6)}, "
+                         f"mean {round(node['total'] / node['count'], 6)}, max {round(node['max'], 6)}")
+        lines.extend(_render_nodes(node['children'], indent + '  '))
+
+    return lines
+
+
+def chrome_trace_events(spans: list[hash], pid: int = 0, tid=0, epoch: float = 0.0) -> list[hash]:
+    # Complete events of the Trace Event Format, read by chrome://tracing and Perfetto. Timestamps are in microseconds,
+    # shifted by the tracer's epoch, so runs recorded by different processes are placed on the same timeline
+    events = []
+    for record in spans:
+        if record['end'] is None:
+            continue
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': (record['start'] + epoch) * 1e6,
+            'dur': (record['end'] - record['start']) * 1e6,
+            'pid': pid,
+            'tid': tid,
+            'args': record['attributes'],
+        })
+        events.extend(chrome_trace_events(record['children'], pid, tid, epoch))
+
+    return events
@@ -0,0 +1,79 @@
+import owlready2 as owl
+from .adapter import AlgorithmAdapter
+from .examples import AlgorithmTestCase
+from .ontology_index import OntologyIndex
+from .ontology_store import load_ontology
+from .performance_analyzer import start_measurement, finish_measurement
+from .tracing import Tracer
+
+# Every worker process holds its own algorithm and ontology.
+# The worker is a fresh process, so its default world is not shared with the parent or other workers.
+_algorithm: AlgorithmAdapter = None
+_ontology: owl.Ontology = None
+_index: OntologyIndex = None
+_warmup: int = 0
+_repetitions: int = 1
+
+
+def initialize_worker(algorithm: AlgorithmAdapter, ontology_source: str, warmup: int = 0, repetitions: int = 1, ontology_cache: str = None):
+    global _algorithm, _ontology, _index, _warmup, _repetitions
+
+    _algorithm = algorithm
+    _warmup = warmup
+    _repetitions = repetitions
+    # With a cache, workers copy the pre-parsed quadstore instead of parsing the source each
+    _ontology = load_ontology(ontology_source, ontology_cache)
+    _index = OntologyIndex(_ontology)
+
+
+def run_algorithm(algorithm: AlgorithmAdapter, test_case: AlgorithmTestCase):
+    # The timer is kept in the meta, so the run can be measured wherever it has been executed or restored.
+    # An adapter may report the timer itself, e.g. a cached run reports the timer of the original run.
+    # Spans opened by the algorithm are recorded by the run's tracer, they are a part of the progress as soon as they are opened
+    tracer = Tracer()
+    test_case.progress['spans'] = tracer.spans
+    test_case.progress['spans_epoch'] = tracer.epoch
+    with tracer.activate():
+        begin = start_measurement()
+        algorithm_result, meta = algorithm.run(test_case)
+        timer = finish_measurement(begin, meta.get('child_usage'))
+
+    return algorithm_result, {'timer': timer, 'spans': tracer.spans, 'spans_epoch': tracer.epoch, **meta}
+
+
+def run_repeatedly(algorithm: AlgorithmAdapter, test_case: AlgorithmTestCase, warmup: int = 0, repetitions: int = 1):
+    # Warmup runs are discarded. Every run starts from a freshly built individual.
+    # The explanations and meta of the last run are returned, the meta of every measured run is kept under 'repetitions'
+    for _ in range(warmup):
+        test_case.destroy()
+        run_algorithm(algorithm, test_case)
+
+    runs = []
+    for _ in range(repetitions):
+        test_case.destroy()
+        runs.append(run_algorithm(algorithm, test_case))
+
+    algorithm_result, meta = runs[-1]
+    if warmup == 0 and repetitions == 1:
+        return algorithm_result, meta
+
+    return algorithm_result, {**meta, 'repetitions': [run_meta for _, run_meta in runs]}
+
+
+def create_test_case(example: hash) -> AlgorithmTestCase:
+    return AlgorithmTestCase(example, _ontology, _index)
+
+
+def run_example(example: hash):
+    return run_test_case(create_test_case(example))
+
+
+def run_test_case(test_case: AlgorithmTestCase):
+    algorithm_result, meta = run_repeatedly(_algorithm, test_case, _warmup, _repetitions)
+    test_case.destroy()
+
+    return {
+        'key': test_case.key,
+        'explanations': [explanation.to_dict() for explanation in algorithm_result],
+        'meta': meta,
+    }
@@ -0,0 +1,205 @@
+import csv
+import json
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from .output_analyzer import OutputAnalyzerResult, FormattedResult
+
+
+def table_name(result: OutputAnalyzerResult) -> str:
+    # PerformanceAnalyzerResult => performance_analyzer
+    name = result.type_name if isinstance(result, FormattedResult) else type(result).__name__
+    name = re.sub(r'Result$', '', name)
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def file_name(key) -> str:
+    # Keys may contain characters that aren't allowed in file names
+    return re.sub(r'[^\w.-]', '_', str(key))
+
+
+class RecordWriter(ABC):
+    # Streams analyzers' records into a structured output. Every analyzer result type is written into its own table.
+    # Writers can be passed to Program as callbacks to write the analysis of every example as soon as it finishes
+    def __init__(self, run: str = None):
+        self._run = run
+
+    def __call__(self, output: list[OutputAnalyzerResult]):
+        for result in output:
+            self.write(result)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, result: OutputAnalyzerResult):
+        records = result.to_records()
+        if self._run is not None:
+            records = [{'run': self._run, **record} for record in records]
+        if records:
+            self.write_records(table_name(result), records)
+
+    @abstractmethod
+    def write_records(self, table: str, records: list[hash]):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (list, tuple, dict)):
+            return json.dumps(value, default=str)
+        return value
+
+
+class JsonLinesWriter(RecordWriter):
+    def __init__(self, path: str, run: str = None):
+        super().__init__(run)
+        self._file = open(path, 'a')
+
+    def write_records(self, table: str, records: list[hash]):
+        for record in records:
+            self._file.write(json.dumps({'table': table, **record}, default=str) + "\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter(RecordWriter):
+    # Tables are written into separate files of the directory. Records are appended under the header of an existing file.
+    # When records bring columns the header doesn't have, the file is rewritten with the columns added, earlier rows leave them empty
+    def __init__(self, directory: str, run: str = None):
+        super().__init__(run)
+        self._directory = directory
+        self._files = {}
+        self._writers = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write_records(self, table: str, records: list[hash]):
+        columns = list(dict.fromkeys(field for record in records for field in record))
+        if table not in self._writers:
+            self._open(table, columns)
+        elif not set(columns) <= set(self._writers[table].fieldnames):
+            self._open(table, [*self._writers[table].fieldnames, *columns])
+
+        self._writers[table].writerows([
+            {field: self._serialize(value) for field, value in record.items()}
+            for record in records
+        ])
+
+    def _open(self, table: str, columns: list[str]):
+        path = os.path.join(self._directory, f"{table}.csv")
+        if table in self._files:
+            self._files.pop(table).close()
+
+        header = self._read_header(path)
+        fieldnames = list(dict.fromkeys([*(header or []), *columns]))
+        if header is not None and fieldnames != header:
+            self._rewrite(path, fieldnames)
+
+        self._files[table] = open(path, 'a', newline='')
+        self._writers[table] = csv.DictWriter(self._files[table], fieldnames=fieldnames)
+        if header is None:
+            self._writers[table].writeheader()
+
+    @staticmethod
+    def _read_header(path: str):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        with open(path, newline='') as file:
+            return next(csv.reader(file), None)
+
+    @staticmethod
+    def _rewrite(path: str, fieldnames: list[str]):
+        # Written next to the file and moved over it, so an interrupted rewrite doesn't lose the rows
+        temporary = f"{path}.tmp"
+        with open(path, newline='') as source, open(temporary, 'w', newline='') as target:
+            writer = csv.DictWriter(target, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(csv.DictReader(source))
+        os.replace(temporary, path)
+
+    def flush(self):
+        for file in self._files.values():
+            file.flush()
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+
+
+class SqliteWriter(RecordWriter):
+    # Tables are created from the first record, columns missing in the table are added on the fly
+    def __init__(self, path: str, run: str = None):
+        super().__init__(run)
+        # Program's dispatcher writes from its own thread
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._columns = {}
+
+    def write_records(self, table: str, records: list[hash]):
+        columns = list(dict.fromkeys(field for record in records for field in record))
+        self._ensure_columns(table, columns)
+
+        placeholders = ', '.join(['?'] * len(columns))
+        self._connection.executemany(
+            f'INSERT INTO "{table}" ({", ".join(self._quote(column) for column in columns)}) VALUES ({placeholders})',
+            [[self._serialize(record.get(column)) for column in columns] for record in records],
+        )
+
+    def flush(self):
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def _ensure_columns(self, table: str, columns: list[str]):
+        if table not in self._columns:
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(self._quote(column) for column in columns)})')
+            self._columns[table] = set(row[1] for row in self._connection.execute(f'PRAGMA table_info("{table}")'))
+
+        for column in columns:
+            if column not in self._columns[table]:
+                self._connection.execute(f'ALTER TABLE "{table}" ADD COLUMN {self._quote(column)}')
+                self._columns[table].add(column)
+
+    @staticmethod
+    def _quote(column: str) -> str:
+        return '"' + column.replace('"', '""') + '"'
+
+
+class LogWriter:
+    # Appends the string form of every analysis into a log, keeping a single buffered handle open for the whole run
+    def __init__(self, path: str, header: str = None, echo: bool = False):
+        self._file = open(path, 'a')
+        self._echo = echo
+        if header is not None:
+            self._file.write(header + "\n")
+
+    def __call__(self, output: list[OutputAnalyzerResult]):
+        for analysis in output:
+            self._file.write(str(analysis) + "\n\n\n\n")
+            if self._echo:
+                print(analysis, end="\n\n\n\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
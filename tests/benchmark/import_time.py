@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+CEO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ceo')
+# Modules the search must not load on import, they are needed for plotting and interactive runs only
+FORBIDDEN = ['matplotlib', 'tqdm']
+# Budget of the cumulative import time of the adapter in seconds
+BUDGET = 2.0
+TOP = 15
+
+
+def measure_imports(module: str) -> list[tuple[str, float, float]]:
+    # `-X importtime` reports every imported module on stderr as `import time: self [us] | cumulative | imported package`
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=CEO,
+        env={**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [CEO, os.environ.get('PYTHONPATH')]))},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(own) / 1e6, int(cumulative) / 1e6))
+
+    return imports
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else 'adapter'
+    imports = measure_imports(module)
+    total = next(cumulative for name, _, cumulative in imports if name == module)
+
+    print(f"Importing {module} takes {total:.3f}s over {len(imports)} modules")
+    print(f"{'self':>11} {'cumulative':>11}  module")
+    for name, own, cumulative in sorted(imports, key=lambda item: item[1], reverse=True)[:TOP]:
+        print(f"{own:10.4f}s {cumulative:10.4f}s  {name}")
+
+    forbidden = sorted({name for name, _, _ in imports if name.split('.')[0] in FORBIDDEN})
+    if forbidden:
+        print(f"Imported on startup although only needed on demand: {', '.join(forbidden)}")
+    if total > BUDGET:
+        print(f"Import time is over the budget of {BUDGET}s")
+
+    return 1 if forbidden or total > BUDGET else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
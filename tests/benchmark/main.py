@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import statistics
+import sys
+import owlready2 as owl
+from performance_evaluation_ohmycthulhu.program import Program
+from performance_evaluation_ohmycthulhu.examples import ExamplesManager
+from performance_evaluation_ohmycthulhu.performance_analyzer import PerformanceAnalyzer, measure_samples, measure_counters
+from synthetic import generate_ontology, generate_examples
+
+# The CEO adapter and its search live next to the pizza evaluation
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ceo'))
+from adapter import CEOAdapter
+
+OUTPUT = 'output'
+EXAMPLES = 5
+REPETITIONS = 1
+# Every parameter is varied over its values while the rest keep their defaults
+DEFAULTS = {
+    'depth': 2,
+    'branching': 2,
+    'properties': 2,
+    'disjointness': 0.5,
+    'assertions': 2,
+}
+GRID = {
+    'depth': [1, 2, 3, 4],
+    'branching': [2, 3, 4, 5],
+    'properties': [1, 2, 3, 4],
+    'disjointness': [0.0, 0.25, 0.5, 0.75, 1.0],
+    'assertions': [1, 2, 3, 4],
+}
+
+
+def run_point(name: str, parameters: hash) -> hash:
+    label = f"{name}-{parameters[name]}"
+    ontology_path = os.path.abspath(os.path.join(OUTPUT, f"{label}.owl"))
+    examples_path = os.path.join(OUTPUT, f"{label}.json")
+
+    description = generate_ontology(
+        ontology_path,
+        f"http://example.org/benchmark/{label}.owl",
+        depth=parameters['depth'],
+        branching=parameters['branching'],
+        properties=parameters['properties'],
+        disjointness=parameters['disjointness'],
+    )
+    examples = generate_examples(examples_path, description, count=EXAMPLES, assertions=parameters['assertions'])
+    ontology = owl.get_ontology(f"file://{ontology_path}").load()
+
+    program = Program(
+        CEOAdapter(),
+        [PerformanceAnalyzer()],
+        example_manager=ExamplesManager(batch_validation=True),
+        repetitions=REPETITIONS,
+    )
+    try:
+        results, _ = program.run(examples, ontology)
+    finally:
+        # The search works in the default world, so the ontology of the point is destroyed
+        # and later points aren't measured against the triples of the earlier ones
+        ontology.destroy()
+
+    finished = [result for result in results if result.is_finished]
+    times = [duration for result in finished for duration in measure_samples(result)['total']]
+    # The search reports its reasoner calls among its counters, so the calls of examples' validation aren't counted
+    counters = [run['total'] for result in finished for run in measure_counters(result)]
+
+    return {
+        'parameter': name,
+        'value': parameters[name],
+        **{f"param_{key}": value for key, value in parameters.items()},
+        'examples': len(results),
+        'finished': len(finished),
+        'time_median': statistics.median(times) if times else None,
+        'time_mean': statistics.fmean(times) if times else None,
+        'reasoner_calls': _mean([run.get('reasoner_calls', 0) for run in counters]),
+        'reasoner_seconds': _mean([run.get('reasoner_seconds', 0) for run in counters]),
+        'nodes': _mean([result.meta['explored_individuals']['total'] for result in finished]),
+        'edges': _mean([result.meta['explored_individuals'].get('edges') for result in finished]),
+        'counterfactuals': _mean([len(result.result) for result in finished]),
+    }
+
+
+def _mean(values: list):
+    values = [value for value in values if value is not None]
+    return statistics.fmean(values) if values else None
+
+
+def save_curves(curves: hash):
+    with open(os.path.join(OUTPUT, 'scaling.json'), 'w') as file:
+        json.dump(curves, file, indent=2)
+
+    for name, points in curves.items():
+        with open(os.path.join(OUTPUT, f"scaling-{name}.csv"), 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(points[0].keys()))
+            writer.writeheader()
+            writer.writerows(points)
+
+
+def plot_curves(curves: hash):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    metrics = [('time_median', 'Median time (in s)'), ('reasoner_calls', 'Reasoner calls'), ('nodes', 'Graph nodes')]
+    for name, points in curves.items():
+        figure, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 4))
+        for axis, (metric, title) in zip(axes, metrics):
+            axis.plot([point['value'] for point in points], [point[metric] for point in points], marker='o')
+            axis.set_xlabel(name)
+            axis.set_title(title)
+        figure.tight_layout()
+        figure.savefig(os.path.join(OUTPUT, f"scaling-{name}.png"))
+        plt.close(figure)
+
+
+def main():
+    os.makedirs(OUTPUT, exist_ok=True)
+    # A single parameter may be chosen, e.g. `python main.py depth`
+    names = sys.argv[1:] or list(GRID.keys())
+    curves = {}
+
+    for name in names:
+        curves[name] = []
+        for value in GRID[name]:
+            point = run_point(name, {**DEFAULTS, name: value})
+            print(point)
+            curves[name].append(point)
+        save_curves(curves)
+
+    plot_curves(curves)
+
+
+if __name__ == '__main__':
+    main()
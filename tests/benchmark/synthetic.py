@@ -0,0 +1,97 @@
+import json
+import random
+import types
+import owlready2 as owl
+
+
+def generate_ontology(path: str, iri: str, depth: int = 2, branching: int = 2, properties: int = 2,
+                      disjointness: float = 0.5, seed: int = 0) -> hash:
+    """
+    Generates an ontology with a subject class, `properties` object properties and a value taxonomy per property.
+
+    Every taxonomy is a tree of the given depth and branching, pairs of sibling classes are declared disjoint with
+    probability `disjointness`. For every property, there is a target class that restricts its values to the
+    first subtree of the taxonomy, so values from disjoint subtrees make an individual of the target inconsistent.
+
+    :param path: File the ontology is saved to
+    :param iri: IRI of the ontology
+    :return: Description of the generated entities' IRIs, used for generating examples
+    """
+    generator = random.Random(seed)
+    ontology = owl.get_ontology(iri)
+    description = {'subject': None, 'properties': []}
+
+    with ontology:
+        subject = types.new_class('Subject', (owl.Thing,))
+        description['subject'] = subject.iri
+
+        for index in range(properties):
+            root = types.new_class(f"Value{index}", (owl.Thing,))
+            leaves = _generate_taxonomy(root, depth, branching, disjointness, generator)
+
+            has_value = types.new_class(f"hasValue{index}", (owl.ObjectProperty,))
+            has_value.domain = [subject]
+            has_value.range = [root]
+
+            allowed = ontology[f"{root.name}_0"] if depth > 0 else root
+            target = types.new_class(f"Target{index}", (subject,))
+            target.is_a.append(has_value.only(allowed))
+
+            description['properties'].append({
+                'property': has_value.iri,
+                'target': target.iri,
+                'leaves': [leaf.iri for leaf in leaves],
+            })
+
+    ontology.save(file=path, format='rdfxml')
+    ontology.destroy()
+
+    return description
+
+
+def _generate_taxonomy(root, depth: int, branching: int, disjointness: float, generator: random.Random) -> list:
+    if depth == 0:
+        return [root]
+
+    children = [types.new_class(f"{root.name}_{index}", (root,)) for index in range(branching)]
+    for first, second in zip(children, children[1:]):
+        if generator.random() < disjointness:
+            owl.AllDisjoint([first, second])
+
+    return [leaf for child in children for leaf in _generate_taxonomy(child, depth - 1, branching, disjointness, generator)]
+
+
+def generate_examples(path: str, description: hash, count: int = 5, assertions: int = 2, seed: int = 0) -> list[hash]:
+    """
+    Generates examples asking to turn an individual with random values into one of the target classes.
+
+    :param path: File the examples are saved to
+    :param description: Description returned by `generate_ontology`
+    :param count: Number of examples
+    :param assertions: Number of assertions per individual, spread over the properties
+    :return: The generated examples
+    """
+    generator = random.Random(seed)
+    properties = description['properties']
+    examples = []
+
+    for index in range(count):
+        # The target's own property is always asserted, the rest of the assertions go to the following properties
+        position = generator.randrange(len(properties))
+        asserted = [properties[(position + offset) % len(properties)] for offset in range(assertions)]
+        examples.append({
+            'key': f"synthetic-{index}",
+            'desiredClass': properties[position]['target'],
+            'assertions': [
+                {
+                    'property': described['property'],
+                    'value': [generator.choice(described['leaves'])],
+                }
+                for described in asserted
+            ],
+        })
+
+    with open(path, 'w') as file:
+        json.dump(examples, file, indent=2)
+
+    return examples
@@ -0,0 +1,104 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.io.PrintWriter;
+import java.io.StringWriter;
+import java.lang.reflect.InvocationTargetException;
+import java.nio.charset.StandardCharsets;
+import java.util.HashMap;
+import java.util.Map;
+
+/**
+ * Long-lived Pellet process driven by reasoner_worker.py over stdin and stdout.
+ *
+ * Every request is a line with the arguments of a Pellet command separated by tabs, e.g.
+ * "realize\t--loader\tJena\t...\t/tmp/ontology.nt". The command is run by Pellet's own command-line classes in this JVM,
+ * so its output is the same as of "java pellet.Pellet ..." without starting a JVM per request.
+ * The response is a header line "returncode stdout-length stderr-length" followed by the bytes of stdout and stderr.
+ *
+ * Launched in source-file mode (Java 11+): java -cp PELLET_CLASSPATH ReasonerServer.java
+ */
+public class ReasonerServer {
+    private static final Map<String, String> COMMANDS = new HashMap<>();
+
+    static {
+        COMMANDS.put("realize", "pellet.PelletRealize");
+        COMMANDS.put("explain", "pellet.PelletExplain");
+        COMMANDS.put("consistency", "pellet.PelletConsistency");
+        COMMANDS.put("classify", "pellet.PelletClassify");
+    }
+
+    public static void main(String[] arguments) throws Exception {
+        // The protocol owns the real stdout. Everything printed by Pellet, including its logging, goes into the buffers
+        // of the request in progress
+        OutputStream protocol = new FileOutputStream(FileDescriptor.out);
+        ByteArrayOutputStream out = new ByteArrayOutputStream();
+        ByteArrayOutputStream err = new ByteArrayOutputStream();
+        System.setOut(new PrintStream(out, true, "UTF-8"));
+        System.setErr(new PrintStream(err, true, "UTF-8"));
+
+        // Pellet's classes are loaded before the worker reports being ready, so a broken classpath fails on start
+        Class.forName(COMMANDS.get("realize"));
+        protocol.write("READY\n".getBytes(StandardCharsets.UTF_8));
+        protocol.flush();
+
+        BufferedReader input = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String line;
+        while ((line = input.readLine()) != null) {
+            if (line.isEmpty()) {
+                continue;
+            }
+
+            out.reset();
+            err.reset();
+            int code = run(line.split("\t"));
+            System.out.flush();
+            System.err.flush();
+
+            byte[] stdout = out.toByteArray();
+            byte[] stderr = err.toByteArray();
+            protocol.write((code + " " + stdout.length + " " + stderr.length + "\n").getBytes(StandardCharsets.UTF_8));
+            protocol.write(stdout);
+            protocol.write(stderr);
+            protocol.flush();
+        }
+    }
+
+    private static int run(String[] arguments) {
+        String command = COMMANDS.get(arguments[0]);
+        if (command == null) {
+            System.err.println("ERROR: Unknown command " + arguments[0]);
+            return 1;
+        }
+
+        try {
+            // The same steps as pellet.Pellet, which would exit the JVM on errors
+            Object application = Class.forName(command).getDeclaredConstructor().newInstance();
+            application.getClass().getMethod("parseArgs", String[].class).invoke(application, (Object) arguments);
+            application.getClass().getMethod("run").invoke(application);
+            application.getClass().getMethod("finish").invoke(application);
+            return 0;
+        } catch (InvocationTargetException e) {
+            Throwable cause = e.getCause();
+            if (cause != null && cause.getClass().getSimpleName().equals("PelletCmdException")) {
+                System.err.println("ERROR: " + cause.getMessage());
+            } else {
+                System.err.println(trace(cause != null ? cause : e));
+            }
+            return 1;
+        } catch (Exception | OutOfMemoryError e) {
+            System.err.println(trace(e));
+            return 1;
+        }
+    }
+
+    private static String trace(Throwable throwable) {
+        StringWriter writer = new StringWriter();
+        throwable.printStackTrace(new PrintWriter(writer));
+        return writer.toString();
+    }
+}
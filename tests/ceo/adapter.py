@@ -1,9 +1,14 @@
+import os
 from typing import Union
 from functools import reduce
 from performance_evaluation_ohmycthulhu.adapter import AlgorithmAdapter, CounterfactualExplanation, AssertionChange
 from performance_evaluation_ohmycthulhu.examples import AlgorithmTestCase
 from graph_generator import generate_counterfactuals
 
+# Runs through the adapter are batch runs, so the search's progress bars are off unless CEO_PROGRESS asks for them.
+# The environment is inherited by the worker processes
+os.environ.setdefault('CEO_PROGRESS', '0')
+
 
 class CEOAdapter(AlgorithmAdapter):
     _TYPE_MAPPING = {
@@ -13,7 +18,12 @@ class CEOAdapter(AlgorithmAdapter):
     }
 
     def run(self, example: AlgorithmTestCase):
-        counterfactuals, meta = generate_counterfactuals(example.ontology, example.individual, example.desired_class)
+        # Stages of the search are recorded as spans by the tracer of the run
+        counterfactuals, meta = generate_counterfactuals(
+            example.ontology,
+            example.individual,
+            example.desired_class,
+        )
 
         run_results = [
             self._map_item(individual, info)
@@ -22,7 +32,16 @@ class CEOAdapter(AlgorithmAdapter):
 
         example.destroy()
 
-        return run_results, meta
+        return run_results, {**meta, 'child_usage': self._child_usage(meta['counters']['total'])}
+
+    @staticmethod
+    def _child_usage(counters: dict):
+        # The persistent reasoner's JVM isn't accounted by the system until it exits, its usage is reported instead
+        return {
+            'cpu_time': counters.get('reasoner_worker_cpu_time', 0.0),
+            'reaped_cpu_time': counters.get('reasoner_worker_reaped_cpu_time', 0.0),
+            'max_rss': counters.get('reasoner_worker_max_rss'),
+        }
 
     def _map_item(self, individual, info):
         modifications = self._calculate_modifications(info)
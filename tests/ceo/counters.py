@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+
+
+class Counters:
+    """
+    Registry of the counters of a single search, e.g. reasoner calls or created nodes.
+    Besides the totals, the registry keeps the increments made within every stage of the search.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._stages = {}
+
+    def reset(self):
+        self.__init__()
+
+    def increment(self, name: str, amount: float = 1):
+        self._values[name] = self._values.get(name, 0) + amount
+
+    def set(self, name: str, value: float):
+        """
+        Sets a gauge, e.g. the size of the graph. The stages get the change of the gauge.
+        """
+        self._values[name] = value
+
+    def maximum(self, name: str, value: float):
+        """
+        Raises a gauge to the value, e.g. the peak memory of a process, unless it is already higher.
+        """
+        self._values[name] = max(self._values.get(name, value), value)
+
+    @contextmanager
+    def timed(self, name: str):
+        """
+        Adds the seconds spent in the block to the counter.
+        """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.increment(name, time.perf_counter() - begin)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Records the increments made within the block as the stage's counters.
+        """
+        before = dict(self._values)
+        try:
+            yield
+        finally:
+            self._stages[name] = {
+                counter: value - before.get(counter, 0)
+                for counter, value in self._values.items() if value != before.get(counter, 0)
+            }
+
+    def to_dict(self) -> dict:
+        """
+        :return: The totals under 'total' and the increments of every stage under its name
+        """
+        return {'total': dict(self._values), **{stage: dict(values) for stage, values in self._stages.items()}}
+
+
+# The search is run by one example at a time in a process, so a single registry is shared by the search's modules
+counters = Counters()
@@ -10,6 +10,8 @@ from owlready2.class_construct import *
 from owlready2.individual import *
 from owlready2.reasoning import _HERE
 
+from reasoner_worker import ReasonerWorkerManager
+
 _HERMIT_RESULT_REGEXP = re.compile("^([A-Za-z]+)\\( ((?:<(?:[^>]+)>\s*)+) \\)$", re.MULTILINE)
 _HERMIT_PROP_REGEXP = re.compile("^<([^>]+)> \\(known instances:\s*(.*?)(?:\s*\\|\s*)possible instances:\s*(.*?)\s*\\)",
                                  re.MULTILINE)
@@ -67,6 +69,20 @@ if (sys.platform == "win32") or (sys.platform == "cygwin"):
 else:
     _subprocess_kargs = {}
 
+# Pellet runs in a JVM kept alive between the calls, so the JVM isn't started and Pellet isn't loaded on every call
+_pellet_worker = ReasonerWorkerManager(_PELLET_CLASSPATH)
+
+
+def _run_pellet(arguments, check):
+    completed = _pellet_worker.run(arguments, JAVA_MEMORY)
+    if completed is None:
+        command = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY, "-cp", _PELLET_CLASSPATH, "pellet.Pellet", *arguments]
+        return subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=check, **_subprocess_kargs)
+
+    if check and completed.returncode != 0:
+        raise subprocess.CalledProcessError(completed.returncode, completed.args, completed.stdout, completed.stderr)
+    return completed
+
 
 def _keep_most_specific(s, consider_equivalence=True):
     r = set()
@@ -259,8 +275,7 @@ def sync_reasoner_pellet(x=None, infer_property_values=False, infer_data_propert
         tmp.close()
 
         # Use Jena for loading because OWLAPI is bugged with NTriples.
-        command = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY, "-cp", _PELLET_CLASSPATH, "pellet.Pellet", "realize",
-                   "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports", tmp.name]
+        command = ["realize", "--loader", "Jena", "--input-format", "N-Triples", "--ignore-imports", tmp.name]
         if infer_property_values:      command.insert(-2, "--infer-prop-values")
         if infer_data_property_values: command.insert(-2, "--infer-data-prop-values")
 
@@ -271,17 +286,13 @@ def sync_reasoner_pellet(x=None, infer_property_values=False, infer_data_propert
             t0 = time.time()
 
         try:
-            output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
-                                    **_subprocess_kargs).stdout
+            output = _run_pellet(command, check=True).stdout
         except subprocess.CalledProcessError as e:
             if (e.returncode == 1) and (b"ERROR: Ontology is inconsistent" in (e.stderr or b"")):  # XXX
                 msg = _decode(e.stderr or e.output or b"")
 
                 if debug > 1:
-                    command_explain = [owlready2.JAVA_EXE, "-Xmx%sM" % JAVA_MEMORY, "-cp", _PELLET_CLASSPATH,
-                                       "pellet.Pellet", "explain", "--ignore-imports", tmp.name]
-                    process = subprocess.run(command_explain, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                             check=False, **_subprocess_kargs)
+                    process = _run_pellet(["explain", "--ignore-imports", tmp.name], check=False)
                     msg += "\nThis is the output of `pellet explain`: \n {}\n{}".format(_decode(process.stdout),
                                                                                         _decode(process.stderr))
 
@@ -7,6 +7,8 @@ from typing import Union
 import owlready2 as owl
 
 import onto_utils
+from counters import counters
+from performance_evaluation_ohmycthulhu.tracing import span
 
 Primitives = Union[int, bool, float, str]
 
@@ -145,28 +147,33 @@ class Individual:
 
     def check_consistency(self, ontology, name="consistencyCheck", destroy=True, return_inconsistent=False, after_check=0):
         if self.is_consistent is not None:
+            counters.increment("consistency_cached")
             return self.is_consistent
-        default_class = list(ontology.classes())[0]
-        new_individual = default_class(name)
-        new_individual.is_a = self.is_a
-        for assertion in self.assertions:
-            if assertion.instance not in list(ontology.individuals()):
-                assertion.instance = onto_utils.get_class_individual(assertion.instance.is_a[0])
-            onto_utils.add_relation_to_indiv(new_individual, assertion.property, assertion.instance)
-        if return_inconsistent:
-            consistent, explanations = onto_utils.is_consistent(ontology, return_explanations=return_inconsistent)
-            inconsistent_assertions = self._extract_inconsistent_assertion(explanations, name)
-        else:
-            consistent = onto_utils.is_consistent(ontology)
-        # ontology.save("test.owl")
-        if destroy:
-            owl.destroy_entity(new_individual)
-
-        if not consistent and after_check > 0 and not onto_utils.is_consistent(ontology):
-            print(f"Ontology is inconsistent even without individual {[str(a) for a in self.assertions]}")
-
-            if after_check > 1:
-                raise Exception(f"Ontology is inconsistent even without individual {[str(a) for a in self.assertions]}")
+        counters.increment("consistency_checks")
+        # Every check is a span, so the latency of the reasoner calls is seen within the stage that made them
+        with span("check_consistency", assertions=len(self.assertions)) as current:
+            default_class = list(ontology.classes())[0]
+            new_individual = default_class(name)
+            new_individual.is_a = self.is_a
+            for assertion in self.assertions:
+                if assertion.instance not in list(ontology.individuals()):
+                    assertion.instance = onto_utils.get_class_individual(assertion.instance.is_a[0])
+                onto_utils.add_relation_to_indiv(new_individual, assertion.property, assertion.instance)
+            if return_inconsistent:
+                consistent, explanations = onto_utils.is_consistent(ontology, return_explanations=return_inconsistent)
+                inconsistent_assertions = self._extract_inconsistent_assertion(explanations, name)
+            else:
+                consistent = onto_utils.is_consistent(ontology)
+            # ontology.save("test.owl")
+            if destroy:
+                owl.destroy_entity(new_individual)
+
+            if not consistent and after_check > 0 and not onto_utils.is_consistent(ontology):
+                print(f"Ontology is inconsistent even without individual {[str(a) for a in self.assertions]}")
+
+                if after_check > 1:
+                    raise Exception(f"Ontology is inconsistent even without individual {[str(a) for a in self.assertions]}")
+            current.set_attribute("consistent", consistent)
 
         self.is_consistent = consistent
         if return_inconsistent:
@@ -175,6 +182,7 @@ class Individual:
             return consistent
 
     def __deepcopy__(self, memodict={}):
+        counters.increment("deepcopies")
         return Individual(copy.deepcopy(self.assertions, memodict), copy.deepcopy(self.is_a, memodict),
                           None)
 
@@ -1,18 +1,50 @@
 import copy
+import os
+import sys
+from contextlib import contextmanager
 from itertools import product, combinations
-from typing import Union, Callable
-import time
+from typing import Union, Callable, Iterable
 
-from tqdm import tqdm
 import owlready2 as owl
 import networkx as nx
-import matplotlib.pyplot as plt
 import onto_utils as utils
+from counters import counters
+from performance_evaluation_ohmycthulhu.tracing import span
 from graph import Individual, create_individual_from_ontology, AssertionRemovalOperation, \
     AssertionInsertionOperation, ClassModificationOperation, Operation, choose_assertion_type, Assertion, \
     ObjectAssertion
 
 
+def show_progress() -> bool:
+    """
+    Checks whether progress bars are shown. They are shown in interactive runs only, unless the CEO_PROGRESS
+    environment variable is set to 1 or 0.
+
+    :return: True when progress bars are shown
+    """
+    setting = os.environ.get("CEO_PROGRESS")
+    if setting is not None:
+        return setting not in ("", "0")
+    return sys.stderr.isatty()
+
+
+def progress(iterable: Iterable, desc: str) -> Iterable:
+    """
+    Wraps the iterable into a progress bar when progress bars are shown and tqdm is installed.
+
+    :param iterable: The iterated values
+    :param desc: Description of the progress bar
+    :return: The iterable, wrapped into a progress bar if it's shown
+    """
+    if not show_progress():
+        return iterable
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        return iterable
+    return tqdm(iterable, desc=desc)
+
+
 def check_list_intersection(list_1: list, list_2: list) -> bool:
     """
     Checks if two lists have at least one element in common.
@@ -272,7 +304,7 @@ def generate_all_ancestors(graph: nx.DiGraph, ontology: owl.Ontology, max_iterat
     n_nodes = 0
     i = 0
     while len(nodes) > n_nodes:
-        for node in tqdm(nodes, desc="Ancestors"):
+        for node in progress(nodes, desc="Ancestors"):
             graph = generate_ancestors(graph, ontology, node)
         graph = connect_all_nodes(graph)
         # show_graph(graph, nodes[0])
@@ -334,9 +366,9 @@ def generate_all_individual_descendants(graph: nx.DiGraph, ontology: owl.Ontolog
     :return: A graph with every descendant of every node.
     """
     # graph.nodes is modified when adding new nodes so we store the preexisting nodes
-    for i in tqdm(range(1, n_iter+1), desc="Iter descendants"):
+    for i in progress(range(1, n_iter+1), desc="Iter descendants"):
         nodes = list(graph.nodes)
-        for node in tqdm(nodes, desc="Descendants"):
+        for node in progress(nodes, desc="Descendants"):
             graph = generate_individual_descendants(graph, ontology, node, only_consistent=only_consistent)
     return graph
 
@@ -373,6 +405,7 @@ def get_node_link(node_source: Individual, node_target: Individual) -> Union[Non
     :param node_target: The node at the end of the edge.
     :return: The Operation that connects both nodes or None if the nodes cannot be connected.
     """
+    counters.increment("node_link_comparisons")
 
     # Only nodes of the same class can be connected
     if node_source.is_a != node_target.is_a:
@@ -617,45 +650,68 @@ def get_modification_list(node_source, node_target):
     return output
 
 
+@contextmanager
+def stage(name: str):
+    """
+    Runs a stage of the search as a span, the counters get the increments made within it.
+
+    :param name: Name of the stage
+    """
+    with span(name), counters.stage(name):
+        yield
+
+
+def count_graph(graph: nx.DiGraph):
+    """
+    Sets the size of the graph as gauges, so every stage gets the number of nodes and edges it has added.
+
+    :param graph: The oriented graph containing individuals.
+    """
+    counters.set("nodes", graph.number_of_nodes())
+    counters.set("edges", graph.number_of_edges())
+
+
 def generate_counterfactuals(ontology, ontology_individual, wanted_class, display_graph=False,
                              non_actionnable_property: owl.ObjectProperty = None, use_naive=True):
-    checkpoints = {
-        'start': time.time()
-    }
+    counters.reset()
 
     print("create_indiv")
-    indiv = create_individual_from_ontology(ontology_individual)
-    owl.destroy_entity(ontology_individual)
-    checkpoints['create_indiv'] = time.time()
+    with stage('create_indiv'):
+        indiv = create_individual_from_ontology(ontology_individual)
+        owl.destroy_entity(ontology_individual)
 
     print("explore and generate")
-    graph = explore_and_generate(None, ontology, indiv, wanted_class, non_actionnable_property=non_actionnable_property,
-                                 use_naive=use_naive)
-    checkpoints['explore_and_generate'] = time.time()
+    with stage('explore_and_generate'):
+        graph = explore_and_generate(None, ontology, indiv, wanted_class,
+                                     non_actionnable_property=non_actionnable_property, use_naive=use_naive)
+        count_graph(graph)
     # show_graph(graph, indiv)
     print("generate ancestors")
-    graph = generate_all_ancestors(graph, ontology, max_iterations=len(indiv.assertions))
-    checkpoints['generate_ancestors'] = time.time()
+    with stage('generate_ancestors'):
+        graph = generate_all_ancestors(graph, ontology, max_iterations=len(indiv.assertions))
+        count_graph(graph)
     # show_graph(graph, indiv)
     print("generate individuals")
-    graph = generate_all_individual_descendants(graph, ontology, n_iter=5)
+    with stage('generate_individuals'):
+        graph = generate_all_individual_descendants(graph, ontology, n_iter=5)
+        count_graph(graph)
     # show_graph(graph, indiv)
-    checkpoints['generate_individuals'] = time.time()
 
     print("connect nodes")
-    graph = connect_all_nodes(graph)
-    checkpoints['connect_all_nodes'] = time.time()
+    with stage('connect_all_nodes'):
+        graph = connect_all_nodes(graph)
+        count_graph(graph)
 
-    n_consistent = 0
-    for node in graph.nodes:
-        if node.is_consistent:
-            n_consistent += 1
-    print(f"{len(graph.nodes)} nodes generated, {n_consistent} valid CFs.")
-    distance_func = create_compute_distance_function(ontology)
-    shortest_paths = nx.single_source_dijkstra(graph, indiv, weight=distance_func)
-    checkpoints['computing_counterfactuals'] = time.time()
+    with stage('computing_counterfactuals'):
+        n_consistent = 0
+        for node in graph.nodes:
+            if node.is_consistent:
+                n_consistent += 1
+        print(f"{len(graph.nodes)} nodes generated, {n_consistent} valid CFs.")
+        distance_func = create_compute_distance_function(ontology)
+        shortest_paths = nx.single_source_dijkstra(graph, indiv, weight=distance_func)
 
-    explored_individuals = {"total": len(graph.nodes), "consistent": n_consistent}
+    explored_individuals = {"total": len(graph.nodes), "consistent": n_consistent, "edges": graph.number_of_edges()}
 
     counterfactuals = {}
     for target in shortest_paths[0].keys():
@@ -664,91 +720,19 @@ def generate_counterfactuals(ontology, ontology_individual, wanted_class, displa
                                        "modifications": get_modification_list(indiv, target)
                                        }
     if display_graph:
-        edges_color = []
-        operations = nx.get_edge_attributes(graph, "operation").values()
-        for operation in operations:
-            if isinstance(operation, AssertionRemovalOperation):
-                edges_color.append("red")
-            elif isinstance(operation, AssertionInsertionOperation):
-                edges_color.append("green")
-            elif isinstance(operation, ClassModificationOperation):
-                edges_color.append("blue")
-            else:
-                edges_color.append("blue")
-        nodes_color = []
-        node_labels = {node: str(node) for node in graph.nodes}
-        for node in graph.nodes:
-            if node == indiv and not node.is_consistent:
-                nodes_color.append("orange")
-            elif node.is_consistent is None:
-                nodes_color.append("blue")
-            elif node.is_consistent:
-                nodes_color.append("green")
-            elif not node.is_consistent:
-                nodes_color.append("red")
-            else:
-                nodes_color.append("black")
-        nx.draw(graph, edge_color=edges_color, node_color=nodes_color, labels=node_labels)
-        plt.show()
-    return counterfactuals, {'checkpoints': checkpoints, "explored_individuals": explored_individuals}
+        show_graph(graph, indiv)
+    return counterfactuals, {"explored_individuals": explored_individuals, "counters": counters.to_dict()}
 
 
 def save_graph(graph, indiv, name=".pdf"):
-    edges_color = []
-    operations = nx.get_edge_attributes(graph, "operation").values()
-    for operation in operations:
-        if isinstance(operation, AssertionRemovalOperation):
-            edges_color.append("red")
-        elif isinstance(operation, AssertionInsertionOperation):
-            edges_color.append("green")
-        elif isinstance(operation, ClassModificationOperation):
-            edges_color.append("blue")
-        else:
-            edges_color.append("blue")
-    nodes_color = []
-    node_labels = {node: str(node) for node in graph.nodes}
-    for node in graph.nodes:
-        if node == indiv and not node.is_consistent:
-            nodes_color.append("orange")
-        elif node.is_consistent is None:
-            nodes_color.append("blue")
-        elif node.is_consistent:
-            nodes_color.append("green")
-        elif not node.is_consistent:
-            nodes_color.append("red")
-        else:
-            nodes_color.append("black")
-    nx.draw(graph, edge_color=edges_color, node_color=nodes_color, labels=node_labels)
-    plt.savefig(name)
+    # Plotting is imported on demand, matplotlib is too heavy to be loaded by every worker
+    from graph_visualization import save_graph as save
+    save(graph, indiv, name)
 
 
 def show_graph(graph, indiv):
-    edges_color = []
-    operations = nx.get_edge_attributes(graph, "operation").values()
-    for operation in operations:
-        if isinstance(operation, AssertionRemovalOperation):
-            edges_color.append("red")
-        elif isinstance(operation, AssertionInsertionOperation):
-            edges_color.append("green")
-        elif isinstance(operation, ClassModificationOperation):
-            edges_color.append("blue")
-        else:
-            edges_color.append("blue")
-    nodes_color = []
-    node_labels = {node: str(node) for node in graph.nodes}
-    for node in graph.nodes:
-        if node == indiv and not node.is_consistent:
-            nodes_color.append("orange")
-        elif node.is_consistent is None:
-            nodes_color.append("blue")
-        elif node.is_consistent:
-            nodes_color.append("green")
-        elif not node.is_consistent:
-            nodes_color.append("red")
-        else:
-            nodes_color.append("black")
-    nx.draw(graph, edge_color=edges_color, node_color=nodes_color, labels=node_labels)
-    plt.show()
+    from graph_visualization import show_graph as show
+    show(graph, indiv)
 
 
 def test_counterfactuals(ontology, individual, wanted_class, display_graph=True,
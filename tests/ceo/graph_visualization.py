@@ -0,0 +1,47 @@
+import networkx as nx
+import matplotlib.pyplot as plt
+from graph import AssertionRemovalOperation, AssertionInsertionOperation, ClassModificationOperation
+
+
+def draw_graph(graph: nx.DiGraph, indiv):
+    """
+    Draws the explored graph, edges are colored by their operation and nodes by their consistency.
+
+    :param graph: The oriented graph containing individuals.
+    :param indiv: The individual the exploration has started from.
+    """
+    edges_color = []
+    operations = nx.get_edge_attributes(graph, "operation").values()
+    for operation in operations:
+        if isinstance(operation, AssertionRemovalOperation):
+            edges_color.append("red")
+        elif isinstance(operation, AssertionInsertionOperation):
+            edges_color.append("green")
+        elif isinstance(operation, ClassModificationOperation):
+            edges_color.append("blue")
+        else:
+            edges_color.append("blue")
+    nodes_color = []
+    node_labels = {node: str(node) for node in graph.nodes}
+    for node in graph.nodes:
+        if node == indiv and not node.is_consistent:
+            nodes_color.append("orange")
+        elif node.is_consistent is None:
+            nodes_color.append("blue")
+        elif node.is_consistent:
+            nodes_color.append("green")
+        elif not node.is_consistent:
+            nodes_color.append("red")
+        else:
+            nodes_color.append("black")
+    nx.draw(graph, edge_color=edges_color, node_color=nodes_color, labels=node_labels)
+
+
+def save_graph(graph: nx.DiGraph, indiv, name=".pdf"):
+    draw_graph(graph, indiv)
+    plt.savefig(name)
+
+
+def show_graph(graph: nx.DiGraph, indiv):
+    draw_graph(graph, indiv)
+    plt.show()
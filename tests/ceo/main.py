@@ -1,52 +1,29 @@
-import owlready2 as owl
-import json
-from datetime import datetime
-from performance_evaluation_ohmycthulhu.program import Program
-from performance_evaluation_ohmycthulhu.output_analyzer import OutputAnalyzerResult
-from performance_evaluation_ohmycthulhu.ranking_analyzer import RankingAnalyzer
-from performance_evaluation_ohmycthulhu.performance_analyzer import PerformanceAnalyzer
-from adapter import CEOAdapter
-
-adapter = CEOAdapter()
-analyzers = [
-    PerformanceAnalyzer(),
-    RankingAnalyzer(),
-]
-
-ontology = owl.get_ontology('file://examples/pizza.owl').load()
-
-with open('examples/pizza.json') as file:
-    examples = json.load(file)
-
-
-current_time = datetime.now()
-log_file_name = current_time.isoformat().replace(':', '_')
-
-
-def get_save_progress():
-    with open(f'output/{log_file_name}-tmp.log', 'w') as file:
-        file.write(f"Program run at {current_time}\n")
-
-    def save_progress(output: list[OutputAnalyzerResult]):
-        with open(f'output/{log_file_name}-tmp.log', 'a') as file:
-            for analysis in output:
-                file.write(str(analysis) + "\n\n\n\n")
-                print(analysis, end="\n\n\n\n")
-
-    return save_progress
-
-
-callbacks = [
-    get_save_progress()
+import os
+import sys
+from performance_evaluation_ohmycthulhu.cli import main
+
+# The evaluation of CEO on the pizza ontology, run with the package's command-line runner.
+# Further options are passed through, e.g. `python main.py --workers 4 --repetitions 5`, `--shard 0/4` or `--resume`
+# to continue the run kept in output/results.jsonl
+ARGUMENTS = [
+    'run',
+    '--adapter', 'adapter:CEOAdapter',
+    '--adapter-path', os.path.dirname(os.path.abspath(__file__)),
+    '--ontology', 'examples/pizza.owl',
+    '--examples', 'examples/pizza.json',
+    # The ontology is parsed once, the workers copy its quadstore
+    '--ontology-cache', 'output/quadstores',
+    '--analyzers', 'performance,ranking,quality',
+    '--output', 'output',
+    '--format', 'log',
+    '--format', 'jsonl',
+    '--echo',
+    '--batch-validation',
+    '--workers', str(os.cpu_count() or 1),
+    # Timings of the run are compared against the baseline. Pass --save-baseline to record it
+    '--baseline', 'output/baseline.json',
 ]
-program = Program(adapter, analyzers, callbacks=callbacks)
-
-results, analysis_results = program.run(examples, ontology)
-
-with open(f"output/{log_file_name}.log", 'w') as file:
-    file.write(f"Program run at {current_time}\n")
-    for analysis in analysis_results:
-        file.write(str(analysis) + "\n\n\n\n")
-        print(analysis, end="\n\n\n\n")
 
-print(results)
+# Worker processes are spawned and re-import this module, so the run must be guarded
+if __name__ == '__main__':
+    sys.exit(main([*ARGUMENTS, *sys.argv[1:]]))
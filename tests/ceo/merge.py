@@ -0,0 +1,16 @@
+import glob
+import sys
+from performance_evaluation_ohmycthulhu.cli import main
+
+# Stores of the shards copied from every machine into the output directory are merged and analyzed together
+ARGUMENTS = [
+    'merge',
+    *sorted(glob.glob('output/results-*-of-*.jsonl')),
+    '--output', 'output/results-merged.jsonl',
+    '--ontology', 'examples/pizza.owl',
+    '--analyzers', 'performance,ranking,quality',
+    '--baseline', 'output/baseline.json',
+]
+
+if __name__ == '__main__':
+    sys.exit(main([*ARGUMENTS, *sys.argv[1:]]))
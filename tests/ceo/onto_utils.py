@@ -2,6 +2,8 @@ import owlready2 as owl
 from typing import Union
 from collections.abc import Iterable
 from custom_reasoning import sync_reasoner_pellet
+from counters import counters
+from performance_evaluation_ohmycthulhu.tracing import span
 
 
 def load_ontology(path: str) -> owl.namespace.Ontology:
@@ -329,7 +331,8 @@ def is_consistent(ontology: owl.namespace.Ontology, debug: int = 0, return_expla
     if return_explanations:
         debug = 2
     temp_onto = owl.get_ontology("http://temp.owl")
-    with temp_onto:
+    counters.increment("reasoner_calls")
+    with temp_onto, counters.timed("reasoner_seconds"), span("reasoner", explanations=return_explanations):
         try:
             sync_reasoner_pellet([ontology], infer_property_values=True, debug=debug, apply_results=False)
             if return_explanations:
@@ -0,0 +1,192 @@
+import atexit
+import os
+import subprocess
+import sys
+
+import owlready2
+
+from counters import counters
+
+SERVER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ReasonerServer.java")
+
+
+class ReasonerWorker:
+    """
+    A long-lived JVM running Pellet's commands, driven over its stdin and stdout (see ReasonerServer.java).
+    A worker serves one request at a time and belongs to the Python process that has started it.
+    """
+
+    def __init__(self, classpath: str, java_memory: int):
+        self._classpath = classpath
+        self._java_memory = java_memory
+        self._process = None
+        self._requests = 0
+        self._reported_cpu_time = 0.0
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        # Java 11+ runs the server from its source, so nothing has to be compiled beforehand
+        command = [owlready2.JAVA_EXE, "-Xmx%sM" % self._java_memory, "-cp", self._classpath, SERVER_SOURCE]
+        kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if sys.platform in ("win32", "cygwin") else {}
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, **kwargs)
+
+        if self._process.stdout.readline() != b"READY\n":
+            self.close()
+            raise RuntimeError("Reasoner worker couldn't be started")
+
+    def run(self, arguments: list[str]) -> subprocess.CompletedProcess:
+        """
+        Runs a Pellet command, e.g. ["realize", ..., path], in the worker.
+
+        :param arguments: Arguments of `pellet.Pellet`. They may not contain tabs or line breaks.
+        :return: The return code and the output of the command, as if it has been run in its own JVM.
+        """
+        self._process.stdin.write(("\t".join(arguments) + "\n").encode("utf8"))
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline()
+        if not header:
+            raise EOFError("Reasoner worker has exited")
+        returncode, stdout_length, stderr_length = (int(value) for value in header.split())
+        stdout = self._read(stdout_length)
+        stderr = self._read(stderr_length)
+        self._requests += 1
+
+        return subprocess.CompletedProcess(["pellet.Pellet", *arguments], returncode, stdout, stderr)
+
+    @property
+    def reported_cpu_time(self) -> float:
+        return self._reported_cpu_time
+
+    def usage(self):
+        """
+        :return: CPU time (user and system, in seconds) and resident memory (in bytes) of the JVM so far,
+        None where they can't be read
+        """
+        try:
+            with open("/proc/%s/stat" % self._process.pid) as file:
+                # The fields after the command name, which may contain spaces, starting from the process' state
+                fields = file.read().rpartition(")")[2].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            return (int(fields[11]) + int(fields[12])) / ticks, int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError, AttributeError):
+            return None
+
+    def report_usage(self):
+        """
+        Adds the CPU time the JVM has used since the previous report to the counters and raises its peak memory.
+        A JVM kept alive between examples is accounted by the system only once it exits, so the usage is reported
+        per example this way.
+        """
+        usage = self.usage()
+        if usage is None:
+            return
+        cpu_time, rss = usage
+        counters.increment("reasoner_worker_cpu_time", cpu_time - self._reported_cpu_time)
+        counters.maximum("reasoner_worker_max_rss", rss)
+        self._reported_cpu_time = cpu_time
+
+    def close(self):
+        if self._process is None:
+            return
+        try:
+            # The server exits once its input is closed
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+            self._process.wait()
+        self._process = None
+
+    def _read(self, length: int) -> bytes:
+        data = self._process.stdout.read(length)
+        if len(data) != length:
+            raise EOFError("Reasoner worker has exited")
+        return data
+
+
+class ReasonerWorkerManager:
+    """
+    Keeps a reasoner worker per Python process. The worker is started on the first request and replaced when it crashes,
+    after `max_requests` requests or once its resident memory exceeds `max_memory` (in MB, by default 1.5 times the heap),
+    so the leaks of a long-lived JVM don't accumulate. When the worker can't be started at all (e.g. Java older than 11),
+    `run` returns None and the caller starts a JVM per call as before.
+    """
+
+    def __init__(self, classpath: str, max_requests: int = 1000, max_memory: int = None):
+        self._classpath = classpath
+        self._max_requests = max_requests
+        self._max_memory = max_memory
+        self._worker = None
+        self._pid = None
+        self._available = os.environ.get("CEO_PERSISTENT_REASONER", "1") != "0"
+        atexit.register(self.close)
+
+    @property
+    def available(self) -> bool:
+        return self._available
+
+    def run(self, arguments: list[str], java_memory: int):
+        if not self._available:
+            return None
+
+        try:
+            worker = self._ensure_worker(java_memory)
+        except (OSError, RuntimeError) as e:
+            print(f"* Reasoner worker * {e}, a JVM is started for every reasoner call", file=sys.stderr)
+            self._available = False
+            return None
+
+        try:
+            completed = worker.run(arguments)
+        except (EOFError, OSError, ValueError):
+            # The worker has crashed, e.g. killed by the system, the request is retried once in a new one
+            self._restart()
+            completed = self._ensure_worker(java_memory).run(arguments)
+        except BaseException:
+            # An interrupted request leaves its response in the pipe, so the worker can't serve the next one
+            self.close()
+            raise
+
+        self._worker.report_usage()
+        self._recycle(java_memory)
+        return completed
+
+    def close(self):
+        if self._worker is not None and self._pid == os.getpid():
+            self._worker.close()
+            # Once waited for, the JVM's whole CPU time is accounted to this process' children,
+            # so the part already reported is subtracted from the example during which it exits
+            counters.increment("reasoner_worker_reaped_cpu_time", self._worker.reported_cpu_time)
+        self._worker = None
+
+    def _ensure_worker(self, java_memory: int) -> ReasonerWorker:
+        # Forked processes don't share the parent's worker, as its pipes would interleave
+        if self._worker is not None and self._pid != os.getpid():
+            self._worker = None
+        if self._worker is not None and not self._worker.is_alive:
+            # The worker has died since the last request. Checking it has reaped it, so it's accounted as any other leaving worker
+            self._restart()
+        if self._worker is None:
+            worker = ReasonerWorker(self._classpath, java_memory)
+            worker.start()
+            self._worker = worker
+            self._pid = os.getpid()
+        return self._worker
+
+    def _restart(self):
+        counters.increment("reasoner_worker_restarts")
+        self.close()
+
+    def _recycle(self, java_memory: int):
+        max_memory = self._max_memory if self._max_memory is not None else java_memory * 1.5
+        usage = self._worker.usage()
+        if self._worker.requests >= self._max_requests or (usage is not None and usage[1] > max_memory * 2 ** 20):
+            self._restart()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from performance_evaluation_ohmycthulhu.stats import QuantileSketch, StreamingSummary
+
+
+def test_negative_values_keep_their_order():
+    summary = StreamingSummary()
+    for value in [-10, -8, -5, -3, -1]:
+        summary.add(value)
+
+    result = summary.summary()
+    assert abs(result['median'] - -5) <= 5 * 0.01
+    assert abs(result['p95'] - -3) <= 3 * 0.01
+    assert result['min'] == -10
+
+
+def test_values_of_both_signs_and_zeros():
+    sketch = QuantileSketch()
+    for value in [-4, -2, 0, 0, 1, 3, 100]:
+        sketch.add(value)
+
+    assert abs(sketch.quantile(0) - -4) <= 4 * 0.01
+    assert abs(sketch.quantile(1 / 6) - -2) <= 2 * 0.01
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(1) - 100) <= 100 * 0.01
+
+
+def test_merged_sketches_match_a_single_one():
+    values = [-7.5, -0.25, 0, 2, 40, -12, 3.5]
+    single, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for index, value in enumerate(values):
+        single.add(value)
+        (first if index % 2 else second).add(value)
+    first.merge(second)
+
+    for fraction in (0, 0.25, 0.5, 0.75, 0.95, 1):
+        assert first.quantile(fraction) == single.quantile(fraction)